@@ -1,3 +1,13 @@
+from functools import lru_cache, partial
+from struct import Struct
+
+import aes_tables
+from aes_tables import INV_S_BOX, MUL_TABLES, S_BOX
+import gf28
+from gf28 import gf_pow
+from modes import BlockCipher, BlockModeContext, pkcs7_padding, pkcs7_padding_size
+
+
 class GF28(int):
     base = 2
     degree = 8
@@ -90,12 +100,74 @@ def calc_s_item(s: int) -> GF28:
     return GF28(mul_res ^ 0x63)
 
 
-S_BOX = [calc_s_item(s) for s in range(256)]
-INV_S_BOX = list(map(lambda x: x[1], sorted(zip(S_BOX, sorted(S_BOX)))))
+def generate_tables() -> dict[str, tuple | dict]:
+    s_box = tuple(int(calc_s_item(s)) for s in range(256))
+    return {
+        'S_BOX': s_box,
+        'INV_S_BOX': tuple(s_box.index(s) for s in range(256)),
+        'MUL_TABLES': {
+            n: tuple(int(GF28(x) * n) for x in range(256))
+            for n in (2, 3, 9, 11, 13, 14)
+        },
+    }
+
+
+def format_table(table: tuple, indent: int) -> str:
+    rows = [
+        ' ' * (indent + 4) + ', '.join(f'0x{x:02X}' for x in table[i : i + 16]) + ','
+        for i in range(0, len(table), 16)
+    ]
+    return '(\n' + '\n'.join(rows) + '\n' + ' ' * indent + ')'
+
+
+def write_tables(path='aes_tables.py') -> None:
+    lines = ['# Generated by `python aes.py --generate`, do not edit', '# fmt:off']
+    for name, table in generate_tables().items():
+        if isinstance(table, dict):
+            items = ''.join(
+                f'    {n}: {format_table(t, 4)},\n' for n, t in table.items()
+            )
+            lines.append(f'{name} = {{\n{items}}}')
+        else:
+            lines.append(f'{name} = {format_table(table, 0)}')
+    lines.append('# fmt:on')
+    with open(path, 'w') as file:
+        file.write('\n'.join(lines) + '\n')
+
+
+def check_tables() -> None:
+    for name, table in generate_tables().items():
+        if getattr(aes_tables, name) != table:
+            raise ValueError(f'{name} does not match GF28 arithmetic')
+    if gf28.EXP_TABLE != tuple(int(GF28(3) ** i) for i in range(255)):
+        raise ValueError('gf28.EXP_TABLE does not match GF28 arithmetic')
+
+
 MIX_COLUMNS_MATRIX = shift_rows([list(map(GF28, (3, 1, 1, 2)))] * 4)[::-1]
 INV_MIX_COLUMNS_MATRIX = shift_rows([list(map(GF28, (11, 13, 9, 14)))] * 4)[::-1]
 
 
+def rotr(word: int, n: int) -> int:
+    return (word >> n | word << 32 - n) & 0xFFFFFFFF
+
+
+def column_words(box: tuple[int, ...], coefs: tuple[int, ...]) -> list[int]:
+    c0, c1, c2, c3 = (MUL_TABLES[c] if c != 1 else range(256) for c in coefs)
+    return [c0[s] << 24 | c1[s] << 16 | c2[s] << 8 | c3[s] for s in box]
+
+
+# T-tables merge SubBytes, ShiftRows and MixColumns for one byte of a column word
+ENC_TABLES = [
+    [rotr(w, 8 * i) for w in column_words(S_BOX, (2, 1, 1, 3))] for i in range(4)
+]
+DEC_TABLES = [
+    [rotr(w, 8 * i) for w in column_words(INV_S_BOX, (14, 9, 13, 11))] for i in range(4)
+]
+ENC_LAST_TABLES = [[s << 24 - 8 * i for s in S_BOX] for i in range(4)]
+DEC_LAST_TABLES = [[s << 24 - 8 * i for s in INV_S_BOX] for i in range(4)]
+BLOCK_WORDS = Struct('>4I')
+
+
 def sub_bytes(block: Block, inv=False) -> Block:
     box = INV_S_BOX if inv else S_BOX
     return [row_sub(row, box) for row in block]
@@ -129,26 +201,275 @@ def aes_block(block_b: bytes, round_keys: list[Block], decrypt=False) -> bytes:
     return block_b
 
 
-def key_expansion(key: int):
-    round_key = to_block(key.to_bytes(16))
-
-    yield transpose(round_key)
-    for i in range(10):
-        round_key[0] = row_xor(round_key[0], row_sub(row_shift(round_key[-1]), S_BOX))
-        round_key[0][0] ^= GF28(2) ** i
-        for j in range(1, 4):
-            round_key[j] = row_xor(round_key[j - 1], round_key[j])
-        yield transpose(round_key)
-
-
-def aes(data: bytes, key: int, decrypt=False) -> bytes:
-    n = len(data) // 16 + (0 if decrypt else 1)
-    blocks = [data[i * 16 : (i + 1) * 16] for i in range(n)]
-    if not decrypt:
-        padding_size = 16 - len(blocks[-1])
-        blocks[-1] += padding_size.to_bytes() * padding_size
-    round_keys = list(key_expansion(key))[:: (-1) ** decrypt]
-    blocks = [aes_block(block, round_keys, decrypt) for block in blocks]
-    if decrypt:
-        blocks[-1] = blocks[-1][: -blocks[-1][-1]]
-    return b''.join(blocks)
+def inv_mix_word(word: int) -> int:
+    T0, T1, T2, T3 = DEC_TABLES
+    return (
+        T0[S_BOX[word >> 24]]
+        ^ T1[S_BOX[word >> 16 & 255]]
+        ^ T2[S_BOX[word >> 8 & 255]]
+        ^ T3[S_BOX[word & 255]]
+    )
+
+
+def encrypt_block_table(block_b: bytes, round_keys: list[int]) -> bytes:
+    T0, T1, T2, T3 = ENC_TABLES
+    s0, s1, s2, s3 = BLOCK_WORDS.unpack(block_b)
+    k0, k1, k2, k3 = round_keys[:4]
+    s0, s1, s2, s3 = s0 ^ k0, s1 ^ k1, s2 ^ k2, s3 ^ k3
+    for i in range(4, len(round_keys) - 4, 4):
+        k0, k1, k2, k3 = round_keys[i : i + 4]
+        s0, s1, s2, s3 = (
+            T0[s0 >> 24] ^ T1[s1 >> 16 & 255] ^ T2[s2 >> 8 & 255] ^ T3[s3 & 255] ^ k0,
+            T0[s1 >> 24] ^ T1[s2 >> 16 & 255] ^ T2[s3 >> 8 & 255] ^ T3[s0 & 255] ^ k1,
+            T0[s2 >> 24] ^ T1[s3 >> 16 & 255] ^ T2[s0 >> 8 & 255] ^ T3[s1 & 255] ^ k2,
+            T0[s3 >> 24] ^ T1[s0 >> 16 & 255] ^ T2[s1 >> 8 & 255] ^ T3[s2 & 255] ^ k3,
+        )
+    T0, T1, T2, T3 = ENC_LAST_TABLES
+    k0, k1, k2, k3 = round_keys[-4:]
+    return BLOCK_WORDS.pack(
+        T0[s0 >> 24] ^ T1[s1 >> 16 & 255] ^ T2[s2 >> 8 & 255] ^ T3[s3 & 255] ^ k0,
+        T0[s1 >> 24] ^ T1[s2 >> 16 & 255] ^ T2[s3 >> 8 & 255] ^ T3[s0 & 255] ^ k1,
+        T0[s2 >> 24] ^ T1[s3 >> 16 & 255] ^ T2[s0 >> 8 & 255] ^ T3[s1 & 255] ^ k2,
+        T0[s3 >> 24] ^ T1[s0 >> 16 & 255] ^ T2[s1 >> 8 & 255] ^ T3[s2 & 255] ^ k3,
+    )
+
+
+def decrypt_block_table(block_b: bytes, round_keys: list[int]) -> bytes:
+    T0, T1, T2, T3 = DEC_TABLES
+    s0, s1, s2, s3 = BLOCK_WORDS.unpack(block_b)
+    k0, k1, k2, k3 = round_keys[:4]
+    s0, s1, s2, s3 = s0 ^ k0, s1 ^ k1, s2 ^ k2, s3 ^ k3
+    for i in range(4, len(round_keys) - 4, 4):
+        k0, k1, k2, k3 = round_keys[i : i + 4]
+        s0, s1, s2, s3 = (
+            T0[s0 >> 24] ^ T1[s3 >> 16 & 255] ^ T2[s2 >> 8 & 255] ^ T3[s1 & 255] ^ k0,
+            T0[s1 >> 24] ^ T1[s0 >> 16 & 255] ^ T2[s3 >> 8 & 255] ^ T3[s2 & 255] ^ k1,
+            T0[s2 >> 24] ^ T1[s1 >> 16 & 255] ^ T2[s0 >> 8 & 255] ^ T3[s3 & 255] ^ k2,
+            T0[s3 >> 24] ^ T1[s2 >> 16 & 255] ^ T2[s1 >> 8 & 255] ^ T3[s0 & 255] ^ k3,
+        )
+    T0, T1, T2, T3 = DEC_LAST_TABLES
+    k0, k1, k2, k3 = round_keys[-4:]
+    return BLOCK_WORDS.pack(
+        T0[s0 >> 24] ^ T1[s3 >> 16 & 255] ^ T2[s2 >> 8 & 255] ^ T3[s1 & 255] ^ k0,
+        T0[s1 >> 24] ^ T1[s0 >> 16 & 255] ^ T2[s3 >> 8 & 255] ^ T3[s2 & 255] ^ k1,
+        T0[s2 >> 24] ^ T1[s1 >> 16 & 255] ^ T2[s0 >> 8 & 255] ^ T3[s3 & 255] ^ k2,
+        T0[s3 >> 24] ^ T1[s2 >> 16 & 255] ^ T2[s1 >> 8 & 255] ^ T3[s0 & 255] ^ k3,
+    )
+
+
+def key_to_bytes(key: int | bytes) -> bytes:
+    if isinstance(key, int):
+        return key.to_bytes(16)
+    if len(key) not in (16, 24, 32):
+        raise ValueError(f'Incorrect key size {len(key) * 8}')
+    return bytes(key)
+
+
+def key_expansion(key: int | bytes):
+    words = to_block(key_to_bytes(key))
+    nk = len(words)
+
+    for i in range(nk, 4 * (nk + 7)):
+        word = words[-1]
+        if i % nk == 0:
+            word = row_sub(row_shift(word), S_BOX)
+            word[0] ^= GF28(2) ** (i // nk - 1)
+        elif nk > 6 and i % nk == 4:
+            word = row_sub(word, S_BOX)
+        words.append(row_xor(words[-nk], word))
+    for i in range(0, len(words), 4):
+        yield transpose(words[i : i + 4])
+
+
+RCON = [gf_pow(2, i) << 24 for i in range(10)]
+KEY_SCHEDULE_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=KEY_SCHEDULE_CACHE_SIZE)
+def expand_key(key: bytes) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    nk = len(key) // 4
+    words = list(Struct(f'>{nk}I').unpack(key))
+    S0, S1, S2, S3 = ENC_LAST_TABLES
+
+    for i in range(nk, 4 * (nk + 7)):
+        w = words[-1]
+        if i % nk == 0:
+            w = S0[w >> 16 & 255] ^ S1[w >> 8 & 255] ^ S2[w & 255] ^ S3[w >> 24]
+            w ^= RCON[i // nk - 1]
+        elif nk > 6 and i % nk == 4:
+            w = S0[w >> 24] ^ S1[w >> 16 & 255] ^ S2[w >> 8 & 255] ^ S3[w & 255]
+        words.append(words[-nk] ^ w)
+
+    dec_words = [w for i in range(len(words) - 4, -1, -4) for w in words[i : i + 4]]
+    dec_words[4:-4] = map(inv_mix_word, dec_words[4:-4])
+    return tuple(words), tuple(dec_words)
+
+
+class AES(BlockCipher):
+    block_size = 16
+
+    def __init__(self, key: int | bytes) -> None:
+        self.key = key_to_bytes(key)
+        self.rounds = len(self.key) // 4 + 6
+        self.enc_keys, self.dec_keys = expand_key(self.key)
+
+    def encrypt_block(self, block_b: bytes) -> bytes:
+        return encrypt_block_table(block_b, self.enc_keys)
+
+    def decrypt_block(self, block_b: bytes) -> bytes:
+        return decrypt_block_table(block_b, self.dec_keys)
+
+
+class ReferenceAES(AES):
+    def __init__(self, key: int | bytes) -> None:
+        self.key = key_to_bytes(key)
+        self.rounds = len(self.key) // 4 + 6
+        self.round_keys = list(key_expansion(self.key))
+
+    def encrypt_block(self, block_b: bytes) -> bytes:
+        return aes_block(block_b, self.round_keys)
+
+    def decrypt_block(self, block_b: bytes) -> bytes:
+        return aes_block(block_b, self.round_keys[::-1], decrypt=True)
+
+
+ENGINES = {'table': AES, 'reference': ReferenceAES}
+NUMPY_MODES = ('ECB', 'CTR')
+NUMPY_THRESHOLD = 1024  # see benchmark.py for the crossover point
+
+
+@lru_cache(maxsize=None)
+def has_numpy() -> bool:
+    from importlib.util import find_spec
+
+    return find_spec('numpy') is not None
+
+
+def aes(
+    data: bytes,
+    key: int | bytes,
+    decrypt=False,
+    engine='auto',
+    mode='ECB',
+    iv: bytes | None = None,
+) -> bytearray:
+    if engine == 'auto':
+        # large ECB/CTR inputs are faster on the numpy engine when it is available
+        large = mode.upper() in NUMPY_MODES and len(data) >= NUMPY_THRESHOLD
+        engine = 'numpy' if large and has_numpy() else 'table'
+    if engine == 'numpy':
+        from aes_numpy import aes_numpy
+
+        return aes_numpy(data, key, decrypt, mode, iv)
+    if engine not in ENGINES:
+        raise ValueError(f'Unknown engine {engine!r}')
+    cipher = ENGINES[engine](key)
+    return cipher.decrypt(data, mode, iv) if decrypt else cipher.encrypt(data, mode, iv)
+
+
+PARALLEL_MODES = ('ECB', 'CTR')
+PARALLEL_CHUNK_SIZE = 1 << 20
+_worker_state = {}
+
+
+def crypt_chunk(
+    buf: memoryview,
+    round_keys: tuple[int, ...],
+    mode: str,
+    decrypt: bool,
+    counter: int,
+) -> None:
+    if mode == 'ECB':
+        block_fun = decrypt_block_table if decrypt else encrypt_block_table
+        for i in range(0, len(buf), 16):
+            buf[i : i + 16] = block_fun(buf[i : i + 16], round_keys)
+        return
+    encrypt_block = partial(encrypt_block_table, round_keys=round_keys)
+    context = BlockModeContext(
+        encrypt_block, encrypt_block, 16, 'CTR', counter.to_bytes(16)
+    )
+    size = context.update_into(buf, buf)
+    buf[size:] = context.finalize()
+
+
+def _init_worker(shm_name: str, enc_keys: tuple, dec_keys: tuple) -> None:
+    from multiprocessing.shared_memory import SharedMemory
+
+    _worker_state.update(shm=SharedMemory(shm_name), keys=(enc_keys, dec_keys))
+
+
+def _crypt_shared_chunk(start: int, end: int, mode: str, decrypt: bool, counter: int):
+    enc_keys, dec_keys = _worker_state['keys']
+    round_keys = dec_keys if decrypt and mode == 'ECB' else enc_keys
+    crypt_chunk(_worker_state['shm'].buf[start:end], round_keys, mode, decrypt, counter)
+
+
+def aes_parallel(
+    data: bytes,
+    key: int | bytes,
+    decrypt=False,
+    mode='CTR',
+    iv: bytes | None = None,
+    workers: int | None = None,
+    chunk_size=PARALLEL_CHUNK_SIZE,
+) -> bytearray:
+    mode = mode.upper()
+    if mode not in PARALLEL_MODES:
+        raise ValueError(f'Mode {mode} can not be parallelized')
+    if mode == 'CTR' and (iv is None or len(iv) != 16):
+        raise ValueError('Mode CTR requires a 16-byte iv')
+    if mode == 'ECB' and decrypt and len(data) % 16:
+        raise ValueError('Data size is not a multiple of the block size')
+    padding = pkcs7_padding(len(data), 16) if mode == 'ECB' and not decrypt else b''
+
+    cipher = AES(key)
+    size = len(data) + len(padding)
+    chunk_size = max(chunk_size // 16 * 16, 16)
+    counter = int.from_bytes(iv or b'')
+    tasks = [
+        (
+            start,
+            min(start + chunk_size, size),
+            mode,
+            decrypt,
+            (counter + start // 16) % (1 << 128),
+        )
+        for start in range(0, size, chunk_size)
+    ]
+
+    if workers == 1 or len(tasks) <= 1:
+        buf = bytearray(data)
+        buf += padding
+        round_keys = cipher.dec_keys if decrypt and mode == 'ECB' else cipher.enc_keys
+        with memoryview(buf) as view:
+            for start, end, *args in tasks:
+                crypt_chunk(view[start:end], round_keys, *args)
+        if mode == 'ECB' and decrypt:
+            del buf[-pkcs7_padding_size(buf[-16:], 16) :]
+        return buf
+
+    from multiprocessing import Pool
+    from multiprocessing.shared_memory import SharedMemory
+
+    shm = SharedMemory(create=True, size=size)
+    try:
+        shm.buf[: len(data)] = data
+        shm.buf[len(data) : size] = padding
+        initargs = (shm.name, cipher.enc_keys, cipher.dec_keys)
+        with Pool(workers, _init_worker, initargs) as pool:
+            pool.starmap(_crypt_shared_chunk, tasks)
+        if mode == 'ECB' and decrypt:
+            size -= pkcs7_padding_size(shm.buf[size - 16 : size], 16)
+        return bytearray(shm.buf[:size])
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+if __name__ == '__main__':
+    import sys
+
+    if '--generate' in sys.argv:
+        write_tables()
+    check_tables()
+    print('AES tables match GF28 arithmetic')
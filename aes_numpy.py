@@ -0,0 +1,98 @@
+import numpy as np
+
+from aes import AES
+from aes_tables import INV_S_BOX, MUL_TABLES, S_BOX
+from modes import pkcs7_padding, pkcs7_padding_size
+
+BATCH_SIZE = 1 << 12  # blocks per crypt_blocks call, bounds the temporary arrays
+S_BOX_ARRAY = np.array(S_BOX, dtype=np.uint8)
+INV_S_BOX_ARRAY = np.array(INV_S_BOX, dtype=np.uint8)
+MUL_ARRAYS = {n: np.array(table, dtype=np.uint8) for n, table in MUL_TABLES.items()}
+# the state is stored column by column, so byte r + 4c is row r of column c
+SHIFT_ROWS = np.array([r + 4 * ((c + r) % 4) for c in range(4) for r in range(4)])
+INV_SHIFT_ROWS = np.array([r + 4 * ((c - r) % 4) for c in range(4) for r in range(4)])
+
+
+def mix_columns(state: np.ndarray, coefs: tuple[int, ...]) -> np.ndarray:
+    columns = state.reshape(-1, 4, 4)
+    result = MUL_ARRAYS[coefs[0]][columns]
+    for i, n in enumerate(coefs[1:], 1):
+        rows = np.roll(columns, -i, axis=2)
+        result ^= MUL_ARRAYS[n][rows] if n != 1 else rows
+    return result.reshape(-1, 16)
+
+
+def round_keys_array(round_keys: tuple[int, ...]) -> np.ndarray:
+    return np.array(round_keys, dtype='>u4').view(np.uint8).reshape(-1, 16)
+
+
+def crypt_blocks(
+    blocks: np.ndarray,
+    round_keys: tuple[int, ...],
+    decrypt=False,
+) -> np.ndarray:
+    if decrypt:
+        box, shift, coefs = INV_S_BOX_ARRAY, INV_SHIFT_ROWS, (14, 11, 13, 9)
+    else:
+        box, shift, coefs = S_BOX_ARRAY, SHIFT_ROWS, (2, 3, 1, 1)
+    keys = round_keys_array(round_keys)
+
+    state = blocks ^ keys[0]
+    for key in keys[1:-1]:
+        state = mix_columns(box[state][:, shift], coefs) ^ key
+    return box[state][:, shift] ^ keys[-1]
+
+
+def counter_blocks(iv: bytes, n: int, start=0) -> np.ndarray:
+    high, low = np.frombuffer(iv, dtype='>u8').astype(np.uint64)
+    lows = low + np.arange(start, start + n, dtype=np.uint64)
+    highs = high + (lows < low).astype(np.uint64)
+    counters = np.stack((highs, lows), axis=1).astype('>u8')
+    return counters.view(np.uint8).reshape(n, 16)
+
+
+def crypt_buffer(buf: bytearray, round_keys: tuple[int, ...], decrypt=False) -> None:
+    blocks = np.frombuffer(buf, dtype=np.uint8).reshape(-1, 16)
+    for i in range(0, len(blocks), BATCH_SIZE):
+        batch = blocks[i : i + BATCH_SIZE]
+        batch[:] = crypt_blocks(batch, round_keys, decrypt)
+
+
+def xor_key_stream(buf: bytearray, round_keys: tuple[int, ...], iv: bytes) -> None:
+    data = np.frombuffer(buf, dtype=np.uint8)
+    for i in range(0, len(data), BATCH_SIZE * 16):
+        batch = data[i : i + BATCH_SIZE * 16]
+        counters = counter_blocks(iv, -(-len(batch) // 16), i // 16)
+        batch ^= crypt_blocks(counters, round_keys).ravel()[: len(batch)]
+
+
+def aes_numpy(
+    data: bytes,
+    key: int | bytes,
+    decrypt=False,
+    mode='ECB',
+    iv: bytes | None = None,
+) -> bytearray:
+    cipher = AES(key)
+    mode = mode.upper()
+    if mode == 'CTR':
+        if iv is None or len(iv) != 16:
+            raise ValueError('Mode CTR requires a 16-byte iv')
+    elif mode != 'ECB':
+        raise ValueError(f'Mode {mode} is not supported by the numpy engine')
+    elif decrypt and len(data) % 16:
+        raise ValueError('Data size is not a multiple of the block size')
+
+    # the output buffer is the only copy of the data, only its last block is padded
+    padding = pkcs7_padding(len(data), 16) if mode == 'ECB' and not decrypt else b''
+    buf = bytearray(len(data) + len(padding))
+    with memoryview(buf) as view:
+        view[: len(data)] = data
+        view[len(data) :] = padding
+    if mode == 'CTR':
+        xor_key_stream(buf, cipher.enc_keys, iv)
+        return buf
+    crypt_buffer(buf, cipher.dec_keys if decrypt else cipher.enc_keys, decrypt)
+    if decrypt:
+        del buf[-pkcs7_padding_size(buf[-16:], 16) :]
+    return buf
@@ -0,0 +1,22 @@
+import os
+from timeit import timeit
+
+from aes import aes
+
+KEY = bytes(16)
+IV = bytes(16)
+
+
+def throughput(fun, data: bytes, *args, **kwargs) -> float:
+    number = max(1, (1 << 16) // len(data))
+    seconds = timeit(lambda: fun(data, *args, **kwargs), number=number)
+    return len(data) * number / seconds / 1e6
+
+
+print('AES-CTR, MB/s')
+print(f'{"size":>8} {"table":>8} {"numpy":>8}')
+for size in (16, 64, 256, 512, 1024, 4096, 65536, 1 << 20):
+    data = os.urandom(size)
+    table = throughput(aes, data, KEY, engine='table', mode='CTR', iv=IV)
+    numpy = throughput(aes, data, KEY, engine='numpy', mode='CTR', iv=IV)
+    print(f'{size:>8} {table:>8.2f} {numpy:>8.2f}')
@@ -1,3 +1,8 @@
+from collections.abc import Sequence
+from functools import lru_cache
+
+from modes import BlockCipher
+
 # fmt:off
 INITIAL_PERMUTATION = (
     58, 50, 42, 34, 26, 18, 10,  2,
@@ -112,6 +117,36 @@ def des_fun(block: int, key: int) -> int:
     return block
 
 
+def byte_tables(rule: tuple[int, ...], size: int) -> list[list[int]]:
+    masks = [0] * size  # permuted value of each single input bit
+    for i, p in enumerate(rule):
+        masks[p - 1] |= 1 << len(rule) - 1 - i
+    tables = []
+    for k in range(size // 8):
+        table = [0] * 256
+        for b in range(1, 256):
+            low = b & -b
+            table[b] = table[b ^ low] | masks[8 * k + 8 - low.bit_length()]
+        tables.append(table)
+    return tables
+
+
+def sp_tables() -> list[list[int]]:
+    tables = []
+    for i in range(8):
+        box = SUBSTITUTION_BOXES[(7 - i) * 64 : (8 - i) * 64]
+        values = (box[(x >> 4 & 2 | x & 1) * 16 + (x >> 1 & 0b1111)] for x in range(64))
+        tables.append([permute_block(v << i * 4, PERMUTATION, 32) for v in values])
+    return tables
+
+
+# each table maps one input byte (or one 6-bit S-box input) to its permuted output
+INITIAL_PERMUTATION_TABLES = byte_tables(INITIAL_PERMUTATION, 64)
+FINAL_PERMUTATION_TABLES = byte_tables(FINAL_PERMUTATION, 64)
+EXPANSION_TABLES = byte_tables(EXPANSION_FUNCTION, 32)
+SP_TABLES = sp_tables()
+
+
 def create_round_keys(key: int):
     cd_vector = permute_block(key, PERMUTED_CHOICE_1, 64)  # 56
     for round in range(16):
@@ -139,14 +174,106 @@ def des_block(block_b: bytes, round_keys: list[int]) -> bytes:
     return block_b
 
 
-def des(data: bytes, key: int, decrypt=False) -> bytes:
-    n = len(data) // 8 + (0 if decrypt else 1)
-    blocks = [data[i * 8 : (i + 1) * 8] for i in range(n)]
-    if not decrypt:
-        padding_size = 8 - len(blocks[-1])
-        blocks[-1] += padding_size.to_bytes() * padding_size
-    round_keys = list(create_round_keys(key))[:: (-1) ** decrypt]
-    blocks = [des_block(block, round_keys) for block in blocks]
-    if decrypt:
-        blocks[-1] = blocks[-1][: -blocks[-1][-1]]
-    return b''.join(blocks)
+def des_block_table(block_b: bytes, *schedules: Sequence[int]) -> bytes:
+    block = 0
+    for table, b in zip(INITIAL_PERMUTATION_TABLES, block_b):
+        block |= table[b]
+
+    E0, E1, E2, E3 = EXPANSION_TABLES
+    S0, S1, S2, S3, S4, S5, S6, S7 = SP_TABLES
+    left, right = block >> 32, block & 0xFFFFFFFF
+    # FP followed by IP is the identity, so chained passes (3DES) only swap halves
+    for round_keys in schedules:
+        for key in round_keys:
+            e = E0[right >> 24] | E1[right >> 16 & 255] | E2[right >> 8 & 255]
+            e = (e | E3[right & 255]) ^ key
+            left, right = right, left ^ (
+                S0[e & 63]
+                | S1[e >> 6 & 63]
+                | S2[e >> 12 & 63]
+                | S3[e >> 18 & 63]
+                | S4[e >> 24 & 63]
+                | S5[e >> 30 & 63]
+                | S6[e >> 36 & 63]
+                | S7[e >> 42]
+            )
+        left, right = right, left
+
+    block = 0
+    for table, b in zip(FINAL_PERMUTATION_TABLES, (left << 32 | right).to_bytes(8)):
+        block |= table[b]
+    return block.to_bytes(8)
+
+
+KEY_SCHEDULE_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=KEY_SCHEDULE_CACHE_SIZE)
+def expand_key(key: int) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    round_keys = tuple(create_round_keys(key))
+    return round_keys, round_keys[::-1]
+
+
+class DES(BlockCipher):
+    block_size = 8
+
+    def __init__(self, key: int) -> None:
+        self.key = key
+        enc_keys, dec_keys = expand_key(key)
+        self.enc_schedules = (enc_keys,)
+        self.dec_schedules = (dec_keys,)
+
+    def encrypt_block(self, block_b: bytes) -> bytes:
+        return des_block_table(block_b, *self.enc_schedules)
+
+    def decrypt_block(self, block_b: bytes) -> bytes:
+        return des_block_table(block_b, *self.dec_schedules)
+
+
+class ReferenceDES(DES):
+    def encrypt_block(self, block_b: bytes) -> bytes:
+        return des_block(block_b, self.enc_schedules[0])
+
+    def decrypt_block(self, block_b: bytes) -> bytes:
+        return des_block(block_b, self.dec_schedules[0])
+
+
+class TripleDES(DES):
+    def __init__(self, key: bytes) -> None:
+        if len(key) not in (16, 24):
+            raise ValueError(f'Incorrect key size {len(key) * 8}')
+        self.key = bytes(key)
+        keys = [int.from_bytes(key[i : i + 8]) for i in range(0, len(key), 8)]
+        if len(keys) == 2:
+            keys.append(keys[0])
+        (enc1, dec1), (enc2, dec2), (enc3, dec3) = map(expand_key, keys)
+        self.enc_schedules = (enc1, dec2, enc3)
+        self.dec_schedules = (dec3, enc2, dec1)
+
+
+ENGINES = {'table': DES, 'reference': ReferenceDES}
+
+
+def des(
+    data: bytes,
+    key: int,
+    decrypt=False,
+    engine='table',
+    mode='ECB',
+    iv: bytes | None = None,
+) -> bytearray:
+    if engine not in ENGINES:
+        raise ValueError(f'Unknown engine {engine!r}')
+    cipher = ENGINES[engine](key)
+    return cipher.decrypt(data, mode, iv) if decrypt else cipher.encrypt(data, mode, iv)
+
+
+def triple_des(
+    data: bytes,
+    key: bytes,
+    decrypt=False,
+    mode='ECB',
+    iv: bytes | None = None,
+) -> bytearray:
+    cipher = TripleDES(key)
+    return cipher.decrypt(data, mode, iv) if decrypt else cipher.encrypt(data, mode, iv)
@@ -0,0 +1,136 @@
+from collections.abc import Iterable
+
+import numpy as np
+
+from des import (
+    BITS_ROTATION_TABLE,
+    EXPANSION_FUNCTION,
+    FINAL_PERMUTATION,
+    INITIAL_PERMUTATION,
+    PERMUTATION,
+    PERMUTED_CHOICE_1,
+    PERMUTED_CHOICE_2,
+    SUBSTITUTION_BOXES,
+)
+from modes import pkcs7_pad, pkcs7_unpad
+
+# bit-plane i holds bit i + 1 (DES numbering) of 64 blocks, one block per uint64 lane
+LANES = 64
+BATCH_SIZE = LANES * 1024
+ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def rule_index(rule: tuple[int, ...]) -> np.ndarray:
+    return np.array(rule) - 1
+
+
+def round_key_indexes() -> list[np.ndarray]:
+    # track which key bit ends up in every round key bit instead of the bits themselves
+    cd = list(PERMUTED_CHOICE_1)
+    indexes = []
+    for rotation in BITS_ROTATION_TABLE:
+        c, d = cd[:28], cd[28:]
+        cd = c[rotation:] + c[:rotation] + d[rotation:] + d[:rotation]
+        indexes.append(rule_index(tuple(cd[p - 1] for p in PERMUTED_CHOICE_2)))
+    return indexes
+
+
+def sbox_truth_table() -> np.ndarray:
+    # table[x, s, o] is output bit o of S-box s for the 6-bit input x as a full lane mask
+    table = np.zeros((64, 8, 4, 1), dtype=np.uint64)
+    for x in range(64):
+        row, col = (x >> 4 & 2) | (x & 1), x >> 1 & 0b1111
+        for s in range(8):
+            value = SUBSTITUTION_BOXES[s * 64 + row * 16 + col]
+            for o in range(4):
+                if value >> 3 - o & 1:
+                    table[x, s, o] = ONES
+    return table
+
+
+INITIAL_PERMUTATION_INDEX = rule_index(INITIAL_PERMUTATION)
+FINAL_PERMUTATION_INDEX = rule_index(FINAL_PERMUTATION)
+EXPANSION_INDEX = rule_index(EXPANSION_FUNCTION)
+PERMUTATION_INDEX = rule_index(PERMUTATION)
+ROUND_KEY_INDEXES = round_key_indexes()
+SBOX_TRUTH_TABLE = sbox_truth_table()
+
+
+def substitute(e: np.ndarray) -> np.ndarray:
+    # a multiplexer tree over the truth tables of all eight S-boxes at once,
+    # each level selects on one input bit starting from the least significant
+    bits = e.reshape(8, 6, 1, -1)
+    values = SBOX_TRUTH_TABLE
+    for k in range(5, -1, -1):
+        low, high = values[0::2], values[1::2]
+        values = low ^ ((low ^ high) & bits[:, k])
+    return values.reshape(32, -1)
+
+
+def crypt_planes(
+    planes: np.ndarray, key_planes: np.ndarray, decrypt=False
+) -> np.ndarray:
+    planes = planes[INITIAL_PERMUTATION_INDEX]
+    left, right = planes[:32], planes[32:]
+    for index in ROUND_KEY_INDEXES[::-1] if decrypt else ROUND_KEY_INDEXES:
+        e = right[EXPANSION_INDEX] ^ key_planes[index]
+        left, right = right, left ^ substitute(e)[PERMUTATION_INDEX]
+    return np.concatenate((right, left))[FINAL_PERMUTATION_INDEX]
+
+
+def to_planes(data: bytes) -> np.ndarray:
+    n = -(-len(data) // 8 // LANES) * LANES
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8)).reshape(-1, 64)
+    bits = np.concatenate((bits, np.zeros((n - len(bits), 64), dtype=np.uint8)))
+    lanes = np.packbits(bits.T.reshape(64, -1, LANES), axis=2, bitorder='little')
+    return np.ascontiguousarray(lanes).view('<u8').reshape(64, -1)
+
+
+def from_planes(planes: np.ndarray, n: int) -> bytes:
+    lanes = np.ascontiguousarray(planes).astype('<u8').view(np.uint8)
+    bits = np.unpackbits(lanes.reshape(64, -1), axis=1, bitorder='little')
+    return np.packbits(bits.T[:n]).tobytes()
+
+
+def constant_planes(value: int) -> np.ndarray:
+    bits = np.array([value >> 63 - i & 1 for i in range(64)], dtype=bool)
+    return np.where(bits, ONES, np.uint64(0))[:, None]
+
+
+def crypt_blocks(data: bytes, key: int, decrypt=False) -> bytes:
+    if len(data) % 8:
+        raise ValueError('Data size is not a multiple of the block size')
+    key_planes = constant_planes(key)
+    result = []
+    for i in range(0, len(data), BATCH_SIZE * 8):
+        batch = data[i : i + BATCH_SIZE * 8]
+        planes = crypt_planes(to_planes(batch), key_planes, decrypt)
+        result.append(from_planes(planes, len(batch) // 8))
+    return b''.join(result)
+
+
+def des_bitslice(data: bytes, key: int, decrypt=False) -> bytes:
+    if decrypt:
+        return pkcs7_unpad(crypt_blocks(data, key, True), 8)
+    return crypt_blocks(pkcs7_pad(data, 8), key)
+
+
+def search_keys(
+    plaintext: bytes,
+    ciphertext: bytes,
+    keys: Iterable[int] | np.ndarray,
+) -> list[int]:
+    plain_planes = constant_planes(int.from_bytes(plaintext))
+    cipher_planes = constant_planes(int.from_bytes(ciphertext))
+    if not isinstance(keys, np.ndarray):
+        keys = np.fromiter(keys, dtype=np.uint64)
+
+    found = []
+    for i in range(0, len(keys), BATCH_SIZE):
+        batch = keys[i : i + BATCH_SIZE].astype('>u8')
+        key_planes = to_planes(batch.tobytes())
+        planes = crypt_planes(plain_planes, key_planes)
+        mismatch = np.bitwise_or.reduce(planes ^ cipher_planes, axis=0)
+        bits = np.unpackbits((~mismatch).view(np.uint8), bitorder='little')
+        found.extend(int(batch[j]) for j in np.flatnonzero(bits[: len(batch)]))
+    return found
@@ -1,97 +1,500 @@
+import os
+import queue
 import secrets
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Iterable
 from dataclasses import dataclass
+from functools import cached_property, lru_cache, partial
 from typing import Any, Callable
 
+# (X, Y, Z) stands for the affine point (X / Z^2, Y / Z^3), Z = 0 is the infinity
+JacobianPoint = tuple[int, int, int]
+JACOBIAN_INFINITY = (1, 1, 0)
+
+
+def jacobian_double(point: JacobianPoint, a: int, p: int) -> JacobianPoint:
+    x, y, z = point
+    if not y or not z:
+        return JACOBIAN_INFINITY
+    yy = y * y % p
+    s = 4 * x * yy % p
+    m = 3 * x * x
+    if a:
+        zz = z * z % p
+        m += a * zz * zz
+    x3 = (m * m - 2 * s) % p
+    y3 = (m * (s - x3) - 8 * yy * yy) % p
+    return x3, y3, 2 * y * z % p
+
+
+def jacobian_add(
+    lhs: JacobianPoint, rhs: JacobianPoint, a: int, p: int
+) -> JacobianPoint:
+    x1, y1, z1 = lhs
+    x2, y2, z2 = rhs
+    if not z1:
+        return rhs
+    if not z2:
+        return lhs
+    z1z1 = z1 * z1 % p
+    z2z2 = z2 * z2 % p
+    u1 = x1 * z2z2 % p
+    u2 = x2 * z1z1 % p
+    s1 = y1 * z2 * z2z2 % p
+    s2 = y2 * z1 * z1z1 % p
+    h = (u2 - u1) % p
+    r = (s2 - s1) % p
+    if not h:
+        return jacobian_double(lhs, a, p) if not r else JACOBIAN_INFINITY
+    hh = h * h % p
+    hhh = h * hh % p
+    v = u1 * hh % p
+    x3 = (r * r - hhh - 2 * v) % p
+    y3 = (r * (v - x3) - s1 * hhh) % p
+    return x3, y3, z1 * z2 * h % p
+
+
+def jacobian_add_affine(
+    lhs: JacobianPoint, rhs: tuple[int, int], a: int, p: int
+) -> JacobianPoint:
+    # mixed addition, rhs has Z = 1
+    x1, y1, z1 = lhs
+    x2, y2 = rhs
+    if not z1:
+        return x2, y2, 1
+    z1z1 = z1 * z1 % p
+    u2 = x2 * z1z1 % p
+    s2 = y2 * z1 * z1z1 % p
+    h = (u2 - x1) % p
+    r = (s2 - y1) % p
+    if not h:
+        return jacobian_double(lhs, a, p) if not r else JACOBIAN_INFINITY
+    hh = h * h % p
+    hhh = h * hh % p
+    v = x1 * hh % p
+    x3 = (r * r - hhh - 2 * v) % p
+    y3 = (r * (v - x3) - y1 * hhh) % p
+    return x3, y3, z1 * h % p
+
+
+def batch_inverse(values: list[int], p: int) -> list[int]:
+    # Montgomery's trick, one modular inversion for the whole list
+    prefix = [1]
+    for value in values:
+        prefix.append(prefix[-1] * value % p)
+    inv = pow(prefix[-1], -1, p)
+    result = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        result[i] = prefix[i] * inv % p
+        inv = inv * values[i] % p
+    return result
+
+
+def batch_to_affine(points: list[JacobianPoint], p: int) -> list[tuple[int, int]]:
+    z_invs = batch_inverse([z for _, _, z in points], p)
+    result = []
+    for (x, y, _), z_inv in zip(points, z_invs):
+        z_inv2 = z_inv * z_inv % p
+        result.append((x * z_inv2 % p, y * z_inv2 * z_inv % p))
+    return result
+
+
+def jacobian_mul(point: JacobianPoint, n: int, a: int, p: int) -> JacobianPoint:
+    result = JACOBIAN_INFINITY
+    for bit in bin(n)[2:]:
+        result = jacobian_double(result, a, p)
+        if bit == '1':
+            result = jacobian_add(result, point, a, p)
+    return result
+
+
+WNAF_WINDOW = 5
+
+
+def wnaf(n: int, window: int) -> list[int]:
+    # width-w NAF digits of n >= 0, least significant first, nonzero ones are odd
+    digits = []
+    while n:
+        digit = 0
+        if n & 1:
+            digit = n & (1 << window) - 1
+            if digit >> window - 1:
+                digit -= 1 << window
+            n -= digit
+        digits.append(digit)
+        n >>= 1
+    return digits
+
+
+def jacobian_multi_mul(
+    terms: list[tuple[int, JacobianPoint]], a: int, p: int, window=WNAF_WINDOW
+) -> JacobianPoint:
+    # sum of k * P over all terms in one interleaved double-and-add pass
+    rows = []
+    nafs = []
+    for k, point in terms:
+        if k < 0:
+            k, point = -k, (point[0], -point[1] % p, point[2])
+        if not k or not point[2]:
+            continue
+        double = jacobian_double(point, a, p)
+        row = [point]
+        for _ in range((1 << window - 2) - 1):
+            row.append(jacobian_add(row[-1], double, a, p))
+        rows.append(row)
+        nafs.append(wnaf(k, window))
+    if not nafs:
+        return JACOBIAN_INFINITY
+
+    # odd multiples P, 3P, 5P, ... in affine form for mixed additions
+    count = 1 << window - 2
+    flat = batch_to_affine([point for row in rows for point in row], p)
+    rows = [flat[i : i + count] for i in range(0, len(flat), count)]
+
+    result = JACOBIAN_INFINITY
+    for i in range(max(map(len, nafs)) - 1, -1, -1):
+        result = jacobian_double(result, a, p)
+        for naf, row in zip(nafs, rows):
+            if i < len(naf) and naf[i]:
+                x, y = row[abs(naf[i]) >> 1]
+                entry = (x, y) if naf[i] > 0 else (x, p - y)
+                result = jacobian_add_affine(result, entry, a, p)
+    return result
+
 
 class Point:
-    def __init__(self, x: int, y: int, curve: 'Curve') -> None:
+    __slots__ = ('x', 'y', 'curve')
+
+    def __init__(
+        self, x: int | None, y: int | None, curve: 'Curve', check=True
+    ) -> None:
         self.x = x
         self.y = y
         self.curve = curve
 
-        if (
+        if check and (
             (y**2) % curve.p != (x**3 + curve.a * x + curve.b) % curve.p
             or x >= curve.p
             or y >= curve.p
         ):
             raise ValueError('The point is not on the curve')
 
+    @property
+    def is_infinity(self) -> bool:
+        return self.x is None
+
+    def to_jacobian(self) -> JacobianPoint:
+        return JACOBIAN_INFINITY if self.x is None else (self.x, self.y, 1)
+
+    @classmethod
+    def from_jacobian(cls, point: JacobianPoint, curve: 'Curve') -> 'Point':
+        # the only inversion, the result is on the curve by construction
+        x, y, z = point
+        if not z:
+            return curve.infinity()
+        p = curve.p
+        z_inv = pow(z, -1, p)
+        z_inv2 = z_inv * z_inv % p
+        return cls(x * z_inv2 % p, y * z_inv2 * z_inv % p, curve, check=False)
+
     def __neg__(self) -> 'Point':
-        return self.curve(self.x, -self.y)
+        if self.x is None:
+            return self
+        return Point(self.x, -self.y % self.curve.p, self.curve, check=False)
 
     def __add__(self, rhs: 'Point') -> 'Point':
-        if self == rhs and self.y:
-            a = 3 * self.x**2 + self.curve.a
-            b = 2 * self.y
-        elif self.x != rhs.x:
-            a = rhs.y - self.y
-            b = rhs.x - self.x
-        else:
-            raise NotImplementedError
-
-        p = self.curve.p
-        slope = a % p * pow(b % p, -1, p) % p
-        x = (slope**2 - self.x - rhs.x) % p
-        y = (slope * (self.x - x) - self.y) % p
-        return self.curve(x, y)
+        curve = self.curve
+        point = jacobian_add(self.to_jacobian(), rhs.to_jacobian(), curve.a, curve.p)
+        return Point.from_jacobian(point, curve)
 
     def __sub__(self, rhs: 'Point') -> 'Point':
         return self + (-rhs)
 
     def __mul__(self, n: int) -> 'Point':
-        if n <= 0:
-            raise NotImplementedError
-        if n == 1:
-            return self
-        half = self * (n // 2)
-        return half + half + self if n % 2 else half + half
+        if n < 0:
+            return -self * -n
+        curve = self.curve
+        point = jacobian_mul(self.to_jacobian(), n, curve.a, curve.p)
+        return Point.from_jacobian(point, curve)
 
     def __eq__(self, rhs: 'Point') -> bool:
-        return self.x == rhs.x and self.y == rhs.y and self.curve == rhs.curve
+        return self.x == rhs.x and self.y == rhs.y and self.curve is rhs.curve
 
     def __repr__(self) -> str:
         return f'Point(x={self.x}, y={self.y}, curve={repr(self.curve)})'
 
 
-@dataclass
+def tonelli_shanks(value: int, p: int, q: int, s: int, z: int) -> int:
+    # p - 1 = q * 2^s with q odd and z a quadratic non-residue modulo p
+    m, c, t, root = s, pow(z, q, p), pow(value, q, p), pow(value, (q + 1) // 2, p)
+    while t > 1:
+        i, t2 = 0, t
+        while t2 != 1:
+            t2 = t2 * t2 % p
+            i += 1
+            if i == m:
+                raise ValueError('Value is not a square modulo p')
+        b = pow(c, 1 << m - i - 1, p)
+        m, c = i, b * b % p
+        t, root = t * c % p, root * b % p
+    return root
+
+
+@dataclass(eq=False)
 class Curve:
     a: int
     b: int
     p: int
 
+    def __post_init__(self) -> None:
+        p = self.p
+        self.size = -(-p.bit_length() // 8)
+        if p % 4 == 3:
+            self.sqrt_exponent = (p + 1) // 4
+        elif p % 8 == 5:  # Atkin
+            self.sqrt_exponent = (p - 5) // 8
+        else:
+            q, s = p - 1, 0
+            while not q & 1:
+                q, s = q >> 1, s + 1
+            z = next(z for z in range(2, p) if pow(z, (p - 1) // 2, p) == p - 1)
+            self.tonelli_shanks = q, s, z
+
     def __call__(self, x: int, y: int) -> Point:
         return Point(x, y, self)
 
+    def sqrt(self, value: int) -> int:
+        p = self.p
+        value %= p
+        if p % 4 == 3:
+            root = pow(value, self.sqrt_exponent, p)
+        elif p % 8 == 5:
+            t = pow(2 * value, self.sqrt_exponent, p)
+            root = value * t * (2 * value * t * t - 1) % p
+        else:
+            root = tonelli_shanks(value, p, *self.tonelli_shanks) if value else 0
+        if root * root % p != value:
+            raise ValueError('Value is not a square modulo p')
+        return root
+
+    def infinity(self) -> Point:
+        return Point(None, None, self, check=False)
+
 
 @dataclass
+class GLV:
+    # lam * (x, y) = (beta * x, y) and the basis is short and spans
+    # the lattice of (a, b) with a + b * lam = 0 mod n
+    beta: int
+    lam: int
+    basis: tuple[tuple[int, int], tuple[int, int]]
+
+    def split(self, k: int, n: int) -> tuple[int, int]:
+        # k = k1 + k2 * lam mod n with both halves about sqrt(n) in absolute value
+        (a1, b1), (a2, b2) = self.basis
+        c1 = (b2 * k + n // 2) // n
+        c2 = (-b1 * k + n // 2) // n
+        return k - c1 * a1 - c2 * a2, -c1 * b1 - c2 * b2
+
+
+FIXED_BASE_WINDOW = 8
+# entries of every row checked against a plain multiplication when a table is loaded
+FIXED_BASE_SAMPLES = 4
+
+
+class FixedBaseTable:
+    # entry (i, d) holds d * 2^(window * i) * base,
+    # so a scalar is a sum of one entry per window without any doublings
+    def __init__(
+        self,
+        base: Point,
+        order: int,
+        window=FIXED_BASE_WINDOW,
+        points: list[tuple[int, int]] | None = None,
+    ) -> None:
+        self.curve = base.curve
+        self.order = order
+        self.window = window
+        self.windows = -(-order.bit_length() // window)
+        self.row_size = (1 << window) - 1
+        self.points = points or self.build(base)
+
+    def build(self, base: Point) -> list[tuple[int, int]]:
+        a, p = self.curve.a, self.curve.p
+        points = []
+        row_base = base.to_jacobian()
+        for _ in range(self.windows):
+            point = row_base
+            for _ in range(self.row_size):
+                points.append(point)
+                point = jacobian_add(point, row_base, a, p)
+            row_base = point
+        return batch_to_affine(points, p)
+
+    def mul(self, n: int) -> JacobianPoint:
+        a, p = self.curve.a, self.curve.p
+        n %= self.order
+        mask = self.row_size
+        result = JACOBIAN_INFINITY
+        for i in range(self.windows):
+            digit = n >> self.window * i & mask
+            if digit:
+                entry = self.points[i * self.row_size + digit - 1]
+                result = jacobian_add_affine(result, entry, a, p)
+        return result
+
+    def verify(self, base: Point, samples=FIXED_BASE_SAMPLES) -> bool:
+        curve = self.curve
+        a, p = curve.a, curve.p
+        try:
+            for x, y in self.points:
+                Point(x, y, curve)
+        except ValueError:
+            return False
+        row_base = base.to_jacobian()
+        for i in range(self.windows):
+            row = self.points[i * self.row_size : (i + 1) * self.row_size]
+            digits = [1, self.row_size]
+            digits += [secrets.randbelow(self.row_size) + 1 for _ in range(samples)]
+            for digit in digits:
+                point = Point.from_jacobian(jacobian_mul(row_base, digit, a, p), curve)
+                if (point.x, point.y) != row[digit - 1]:
+                    return False
+            for _ in range(self.window):
+                row_base = jacobian_double(row_base, a, p)
+        return True
+
+    def save(self, path: str) -> None:
+        # readers in other processes must never see a partially written table
+        size = -(-self.curve.p.bit_length() // 8)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'wb') as file:
+                for x, y in self.points:
+                    file.write(x.to_bytes(size) + y.to_bytes(size))
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @classmethod
+    def load(
+        cls, path: str, base: Point, order: int, window=FIXED_BASE_WINDOW
+    ) -> 'FixedBaseTable':
+        size = -(-base.curve.p.bit_length() // 8)
+        with open(path, 'rb') as file:
+            data = file.read()
+        words = [int.from_bytes(data[i : i + size]) for i in range(0, len(data), size)]
+        points = list(zip(words[0::2], words[1::2]))
+        count = -(-order.bit_length() // window) * ((1 << window) - 1)
+        if len(data) != count * 2 * size:
+            raise ValueError(f'Table in {path} does not match the base point')
+        table = cls(base, order, window, points)
+        if not table.verify(base):
+            raise ValueError(f'Table in {path} does not match the base point')
+        return table
+
+
+@dataclass(eq=False)
 class ecdsa_params:
     curve: Curve
     g_point: Point
     n: int
     point_to_bytes: Callable[[Point], bytes]
     point_from_bytes: Callable[[bytes], Point]
+    # the fixed-base table of g_point is read from here if the file exists,
+    # otherwise it is built on first use and written here
+    g_table_path: str | None = None
+    # known endomorphism constants enable the GLV split of variable-base scalars
+    glv: GLV | None = None
+
+    @cached_property
+    def g_table(self) -> FixedBaseTable:
+        path = self.g_table_path
+        if path and os.path.exists(path):
+            try:
+                return FixedBaseTable.load(path, self.g_point, self.n)
+            except ValueError:
+                pass  # a corrupt or stale file is rebuilt and overwritten
+        table = FixedBaseTable(self.g_point, self.n)
+        if path:
+            table.save(path)
+        return table
+
+    def mul_g(self, k: int) -> Point:
+        return Point.from_jacobian(self.g_table.mul(k), self.curve)
+
+    def mul(self, point: Point, k: int) -> Point:
+        return multi_mul([(k, point)], self)
+
+    def split_terms(
+        self, terms: Iterable[tuple[int, JacobianPoint]]
+    ) -> list[tuple[int, JacobianPoint]]:
+        p = self.curve.p
+        result = []
+        for k, (x, y, z) in terms:
+            k %= self.n
+            if self.glv is None:
+                result.append((k, (x, y, z)))
+                continue
+            k1, k2 = self.glv.split(k, self.n)
+            result += [(k1, (x, y, z)), (k2, (self.glv.beta * x % p, y, z))]
+        return result
+
+
+def multi_mul(
+    terms: Iterable[tuple[int, Point]], params: ecdsa_params | None = None
+) -> Point:
+    # with params the scalars are reduced modulo n, multiples of g_point come
+    # from the fixed-base table and the other terms are split with GLV if possible
+    terms = list(terms)
+    if not terms:
+        raise ValueError('At least one term is required')
+    curve = terms[0][1].curve
+    result = JACOBIAN_INFINITY
+    if params is not None:
+        g_scalars = [k for k, point in terms if point == params.g_point]
+        if g_scalars:
+            terms = [(k, point) for k, point in terms if point != params.g_point]
+            result = params.g_table.mul(sum(g_scalars))
+    jacobian_terms = [(k, point.to_jacobian()) for k, point in terms]
+    if params is not None:
+        jacobian_terms = params.split_terms(jacobian_terms)
+    point = jacobian_multi_mul(jacobian_terms, curve.a, curve.p)
+    point = jacobian_add(result, point, curve.a, curve.p)
+    return Point.from_jacobian(point, curve)
 
 
 def sec_point_to_bytes(point: Point, compressed=True) -> bytes:
+    if point.is_infinity:
+        return b'\x00'
+    size = point.curve.size
     prefix = (0x03 if point.y % 2 else 0x02) if compressed else 0x04
-    data = [prefix.to_bytes(), point.x.to_bytes(32)]
+    data = [prefix.to_bytes(), point.x.to_bytes(size)]
     if not compressed:
-        data.append(point.y.to_bytes(32))
+        data.append(point.y.to_bytes(size))
     return b''.join(data)
 
 
-def sec_point_from_bytes(data: bytes) -> Point:
-    curve = secp256k1.curve
-    prefix = data[0]
-    x = int.from_bytes(data[1:33])
-    if prefix == 0x04:
-        y = int.from_bytes(data[1:33])
-    elif prefix in (0x02, 0x03):
-        y = pow(x**3 + curve.a * x + curve.b, (curve.p + 1) // 4, curve.p)
+def sec_point_from_bytes(data: bytes, curve: Curve | None = None) -> Point:
+    curve = curve or secp256k1.curve
+    size = curve.size
+    prefix = data[0] if data else None
+    x = int.from_bytes(data[1 : 1 + size])
+    if prefix == 0x04 and len(data) == 1 + 2 * size:
+        y = int.from_bytes(data[1 + size :])
+    elif prefix in (0x02, 0x03) and len(data) == 1 + size:
+        if x >= curve.p:
+            raise ValueError('The point is not on the curve')
+        y = curve.sqrt(x**3 + curve.a * x + curve.b)
         if (y % 2) ^ (prefix != 0x02):
-            y = curve.p - y
+            y = -y % curve.p
     else:
-        raise ValueError
+        raise ValueError('Incorrect point encoding')
     return curve(x, y)
 
 
@@ -146,9 +549,55 @@ secp256k1 = ecdsa_params(
     ),
     0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141,
     sec_point_to_bytes,
-    sec_point_from_bytes,
+    partial(sec_point_from_bytes, curve=curve),
+    glv=GLV(
+        beta=0x7AE96A2B657C07106E64479EAC3434E99CF0497512F58995C1396C28719501EE,
+        lam=0x5363AD4CC05C30E0A5261C028812645A122E22EA20816678DF02967C1B23BD72,
+        basis=(
+            (0x3086D221A7D46BCDE86C90E49284EB15, -0xE4437ED6010E88286F547FA90ABFE4C3),
+            (0x114CA50F7A8E2F3F657C1108D9D44CFD8, 0x3086D221A7D46BCDE86C90E49284EB15),
+        ),
+    ),
+)
+
+secp256r1 = ecdsa_params(
+    curve := Curve(
+        a=0xFFFFFFFF00000001000000000000000000000000FFFFFFFFFFFFFFFFFFFFFFFC,
+        b=0x5AC635D8AA3A93E7B3EBBD55769886BC651D06B0CC53B0F63BCE3C3E27D2604B,
+        p=0xFFFFFFFF00000001000000000000000000000000FFFFFFFFFFFFFFFFFFFFFFFF,
+    ),
+    curve(
+        x=0x6B17D1F2E12C4247F8BCE6E563A440F277037D812DEB33A0F4A13945D898C296,
+        y=0x4FE342E2FE1A7F9B8EE7EB4A7C0F9E162BCE33576B315ECECBB6406837BF51F5,
+    ),
+    0xFFFFFFFF00000000FFFFFFFFFFFFFFFFBCE6FAADA7179E84F3B9CAC2FC632551,
+    sec_point_to_bytes,
+    partial(sec_point_from_bytes, curve=curve),
+)
+
+secp384r1 = ecdsa_params(
+    curve := Curve(
+        a=0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFFFF0000000000000000FFFFFFFC,
+        b=0xB3312FA7E23EE7E4988E056BE3F82D19181D9C6EFE8141120314088F5013875AC656398D8A2ED19D2A85C8EDD3EC2AEF,
+        p=0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFFFF0000000000000000FFFFFFFF,
+    ),
+    curve(
+        x=0xAA87CA22BE8B05378EB1C71EF320AD746E1D3B628BA79B9859F741E082542A385502F25DBF55296C3A545E3872760AB7,
+        y=0x3617DE4A96262C6F5D9E98BF9292DC29F8F41DBD289A147CE9DA3113B5F0B8C00A60B1CE1D7E819D7A431D7C90EA0E5F,
+    ),
+    0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFC7634D81F4372DDF581A0DB248B0A77AECEC196ACCC52973,
+    sec_point_to_bytes,
+    partial(sec_point_from_bytes, curve=curve),
 )
 
+CURVES = {
+    'secp256k1': secp256k1,
+    'secp256r1': secp256r1,
+    'P-256': secp256r1,
+    'secp384r1': secp384r1,
+    'P-384': secp384r1,
+}
+
 
 def ecdsa_keygen(
     private_key: int | None = None,
@@ -156,7 +605,7 @@ def ecdsa_keygen(
 ) -> tuple[int, bytes]:
     if private_key is None:
         private_key = secrets.randbelow(params.n - 1) + 1
-    public_key = params.g_point * private_key
+    public_key = params.mul_g(private_key)
 
     return private_key, params.point_to_bytes(public_key)
 
@@ -167,7 +616,7 @@ def ecdsa_sign(
     params: ecdsa_params = secp256k1,
 ) -> bytes:
     k = secrets.randbelow(params.n - 1) + 1
-    r_point = params.g_point * k
+    r_point = params.mul_g(k)
     r = r_point.x % params.n
 
     s = ((msg + r * private_key) * pow(k, -1, params.n)) % params.n
@@ -176,21 +625,272 @@ def ecdsa_sign(
     return to_der_format((r, s))[0]
 
 
+NONCE_POOL_SIZE = 64
+
+
+@dataclass
+class SignerMetrics:
+    hits: int = 0
+    misses: int = 0
+    refills: int = 0
+    refill_seconds: float = 0.0
+
+    @property
+    def refill_latency(self) -> float:
+        return self.refill_seconds / self.refills if self.refills else 0.0
+
+
+class Signer:
+    # nonces k with r = (k * G).x mod n and k^-1 mod n are precomputed by
+    # a background thread, every queued nonce is taken by exactly one sign()
+    def __init__(
+        self,
+        private_key: int,
+        params: ecdsa_params = secp256k1,
+        pool_size=NONCE_POOL_SIZE,
+    ) -> None:
+        if pool_size < 1:
+            raise ValueError('Pool size must be positive')
+        self.private_key = private_key
+        self.params = params
+        self.pool_size = pool_size
+        self.metrics = SignerMetrics()
+        self.closed = False
+        self.stopped = threading.Event()
+        self.start()
+
+    def start(self) -> None:
+        # also called in a forked child, which must not take the nonces queued
+        # before the fork because the parent can still take the same ones
+        self.stopped.set()
+        self.pid = os.getpid()
+        self.nonces = queue.Queue(maxsize=self.pool_size)
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        if self.closed:
+            return
+        # the thread only holds a weak reference, an unclosed signer is still
+        # collected and then stops its thread
+        weakref.finalize(self, self.stopped.set)
+        self.thread = threading.Thread(
+            target=_refill_nonces, args=(weakref.ref(self), self.stopped), daemon=True
+        )
+        self.thread.start()
+
+    def make_nonce(self) -> tuple[int, int, int]:
+        n = self.params.n
+        while True:
+            k = secrets.randbelow(n - 1) + 1
+            r = self.params.mul_g(k).x % n
+            if r:
+                return k, r, pow(k, -1, n)
+
+    def refill(self) -> tuple[int, int, int]:
+        start = time.perf_counter()
+        nonce = self.make_nonce()
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.metrics.refills += 1
+            self.metrics.refill_seconds += elapsed
+        return nonce
+
+    def take_nonce(self) -> tuple[int, int, int]:
+        if os.getpid() != self.pid:
+            self.start()
+        try:
+            nonce = self.nonces.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                self.metrics.misses += 1
+            return self.make_nonce()
+        with self.lock:
+            self.metrics.hits += 1
+        return nonce
+
+    def sign(self, msg: int) -> bytes:
+        n = self.params.n
+        while True:
+            _, r, inv_k = self.take_nonce()
+            s = (msg + r * self.private_key) * inv_k % n
+            if s:
+                return to_der_format((r, s))[0]
+
+    def close(self) -> None:
+        self.closed = True
+        self.stopped.set()
+        if os.getpid() == self.pid:
+            self.thread.join()
+
+    def __enter__(self) -> 'Signer':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def _refill_nonces(ref: weakref.ref, stopped: threading.Event) -> None:
+    while not stopped.is_set():
+        signer = ref()
+        if signer is None:
+            return
+        nonces, nonce = signer.nonces, signer.refill()
+        del signer
+        while not stopped.is_set():
+            try:
+                nonces.put(nonce, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+
+
+def parse_signature(sign: bytes) -> tuple[int, int]:
+    match from_der_format(sign):
+        case (int(r), int(s)), int(l) if l == len(sign):
+            return r, s
+        case _:
+            raise ValueError('Incorrect signature')
+
+
+def jacobian_x_matches(point: JacobianPoint, r: int, n: int, p: int) -> bool:
+    # x / z^2 is compared with r and r + n without converting to affine
+    x, _, z = point
+    zz = z * z % p
+    return bool(z) and any(x == c * zz % p for c in (r, r + n) if c < p)
+
+
+VERIFYING_KEY_CACHE_SIZE = 1024
+VERIFYING_KEY_WINDOW = 4
+VERIFYING_KEY_TABLE_AFTER = 8
+# a window table takes about 180 KB, only the most recently used keys keep one
+VERIFYING_KEY_TABLE_CACHE_SIZE = 32
+_key_tables: OrderedDict['VerifyingKey', FixedBaseTable] = OrderedDict()
+_key_tables_lock = threading.Lock()
+
+
+class VerifyingKey:
+    def __init__(self, point: Point, params: ecdsa_params = secp256k1) -> None:
+        if point.is_infinity:
+            raise ValueError('The point at infinity is not a valid public key')
+        self.point = point
+        self.params = params
+        self.uses = 0
+
+    @classmethod
+    def from_bytes(
+        cls, data: bytes, params: ecdsa_params = secp256k1
+    ) -> 'VerifyingKey':
+        return cls(params.point_from_bytes(data), params)
+
+    def to_bytes(self) -> bytes:
+        return self.params.point_to_bytes(self.point)
+
+    def table(self) -> FixedBaseTable | None:
+        # hot keys pay for a window table once and then skip all doublings,
+        # a key that loses its table has to become hot again to rebuild it
+        with _key_tables_lock:
+            self.uses += 1
+            if self in _key_tables:
+                _key_tables.move_to_end(self)
+                return _key_tables[self]
+            if self.uses <= VERIFYING_KEY_TABLE_AFTER:
+                return None
+        table = FixedBaseTable(self.point, self.params.n, VERIFYING_KEY_WINDOW)
+        with _key_tables_lock:
+            _key_tables[self] = table
+            while len(_key_tables) > VERIFYING_KEY_TABLE_CACHE_SIZE:
+                key, _ = _key_tables.popitem(last=False)
+                key.uses = 0
+        return table
+
+    def mul(self, k: int) -> JacobianPoint:
+        table = self.table()
+        if table is not None:
+            return table.mul(k)
+        curve = self.params.curve
+        terms = self.params.split_terms([(k, self.point.to_jacobian())])
+        return jacobian_multi_mul(terms, curve.a, curve.p)
+
+    def verify_inverted(self, msg: int, r: int, inv_s: int) -> bool:
+        params = self.params
+        a, p = params.curve.a, params.curve.p
+        point = jacobian_add(params.g_table.mul(msg * inv_s), self.mul(r * inv_s), a, p)
+        return jacobian_x_matches(point, r, params.n, p)
+
+    def verify(self, msg: int, sign: bytes) -> bool:
+        r, s = parse_signature(sign)
+        if not (0 < r < self.params.n and 0 < s < self.params.n):
+            return False
+        return self.verify_inverted(msg, r, pow(s, -1, self.params.n))
+
+
+@lru_cache(maxsize=VERIFYING_KEY_CACHE_SIZE)
+def verifying_key(public_key: bytes, params: ecdsa_params = secp256k1) -> VerifyingKey:
+    return VerifyingKey.from_bytes(public_key, params)
+
+
 def ecdsa_verify(
     msg: int,
     sign: bytes,
     public_key: bytes,
     params: ecdsa_params = secp256k1,
 ) -> bool:
-    public_key_point = params.point_from_bytes(public_key)
-    match from_der_format(sign):
-        case (int(r), int(s)), int(l) if l == len(sign):
-            pass
-        case _:
-            raise ValueError('Incorrect signature')
+    return verifying_key(bytes(public_key), params).verify(msg, sign)
+
+
+VERIFY_CHUNK_SIZE = 256
+_worker_state = {}
+
+
+def verify_chunk(
+    items: list[tuple[int, bytes, bytes]], params: ecdsa_params
+) -> list[bool]:
+    n = params.n
+    parsed = []
+    for msg, sign, public_key in items:
+        try:
+            key = verifying_key(bytes(public_key), params)
+            r, s = parse_signature(sign)
+        except (ValueError, IndexError):
+            parsed.append(None)
+            continue
+        parsed.append((msg, r, s, key) if 0 < r < n and 0 < s < n else None)
 
-    inv_s = pow(s, -1, params.n)
-    u = (msg * inv_s) % params.n
-    v = (r * inv_s) % params.n
-    c_point = (params.g_point * u) + (public_key_point * v)
-    return c_point.x == r
+    # one inversion modulo n for all signatures
+    valid = [item for item in parsed if item]
+    inv_s = iter(batch_inverse([s for _, _, s, _ in valid], n))
+    results = []
+    for item in parsed:
+        if item is None:
+            results.append(False)
+            continue
+        msg, r, _, key = item
+        results.append(key.verify_inverted(msg, r, next(inv_s)))
+    return results
+
+
+def _init_verify_worker(params: ecdsa_params) -> None:
+    _worker_state['params'] = params
+
+
+def _verify_shared_chunk(items: list[tuple[int, bytes, bytes]]) -> list[bool]:
+    return verify_chunk(items, _worker_state['params'])
+
+
+def ecdsa_verify_batch(
+    items: Iterable[tuple[int, bytes, bytes]],
+    params: ecdsa_params = secp256k1,
+    workers: int | None = None,
+    chunk_size=VERIFY_CHUNK_SIZE,
+) -> list[bool]:
+    # malformed signatures and public keys verify as False instead of raising
+    items = list(items)
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+    if workers == 1 or len(chunks) <= 1:
+        return [result for chunk in chunks for result in verify_chunk(chunk, params)]
+
+    from multiprocessing import Pool
+
+    params.g_table  # build once here instead of in every worker
+    with Pool(workers, _init_verify_worker, (params,)) as pool:
+        results = pool.map(_verify_shared_chunk, chunks)
+    return [result for chunk in results for result in chunk]
@@ -1,3 +1,6 @@
+import re
+from functools import lru_cache
+
 WIRING = {
     'I': 'EKMFLGDQVZNTOWYHXUSPAIBRCJ',
     'II': 'AJDKSIRUXBLHWTMCQGZNPYFVOE',
@@ -11,6 +14,9 @@ WIRING = {
 }
 NOTCH = {'I': 'Q', 'II': 'E', 'III': 'V', 'IV': 'J', 'V': 'Z'}
 ORD_A = ord('A')
+NON_ALPHABET = re.compile(f'([^{WIRING["ETW"]}]+)')
+# characters below 'A', a compiled substitution table appends the letters to it
+TRANSLATE_PREFIX = ''.join(map(chr, range(ORD_A)))
 
 
 def char2pos(char: str) -> int:
@@ -54,8 +60,19 @@ class Rotor:
         return is_advanced
 
     def transmute(self, pin: int, reverse: bool = False) -> int:
+        return self.transmute_at(pin, self.pos, reverse)
+
+    def transmute_at(self, pin: int, pos: int, reverse: bool = False) -> int:
         perm = self.rev_perm if reverse else self.perm
-        return (pin + perm[(pin + self.pos - self.ring) % self.size]) % self.size
+        return (pin + perm[(pin + pos - self.ring) % self.size]) % self.size
+
+    def tables(self, reverse: bool = False) -> list[dict[int, int]]:
+        # str.translate tables of the rotor in every position
+        tables = []
+        for pos in range(self.size):
+            pins = (self.transmute_at(pin, pos, reverse) for pin in range(self.size))
+            tables.append(str.maketrans(WIRING['ETW'], ''.join(map(pos2char, pins))))
+        return tables
 
 
 class Enigma:
@@ -66,6 +83,7 @@ class Enigma:
         rings: list[str],
         positions: list[str],
         plugboard: list[str],
+        trace: bool = False,
     ) -> None:
         self.rotors = [
             Rotor(wiring2perm(w), char2pos(NOTCH[w]), char2pos(r), char2pos(p))
@@ -75,6 +93,10 @@ class Enigma:
         self.plugboard = Rotor(steckerverbindungen2perm(plugboard), 0, 0, 0)
         self.alphabet = set(WIRING['ETW'])
         self.trace = []
+        self.tracing = trace
+        self.compiled = compile_enigma(
+            reflector, tuple(rotors), tuple(rings), tuple(plugboard)
+        )
 
     def rotate(self) -> None:
         for rotor in reversed(self.rotors):
@@ -102,7 +124,104 @@ class Enigma:
         return char
 
     def transmute_text(self, text: str) -> str:
-        return ''.join(self.round(ch) if ch in self.alphabet else ch for ch in text)
+        if self.tracing:
+            return ''.join(self.round(ch) if ch in self.alphabet else ch for ch in text)
+        state = tuple(rotor.pos for rotor in self.rotors)
+        text, state = self.compiled.transmute(text, state)
+        for rotor, pos in zip(self.rotors, state):
+            rotor.pos = pos
+        return text
 
     def get_trace(self):
         return ' -> '.join(map(pos2char, self.trace))
+
+
+class CompiledEnigma:
+    # stepping and the substitution of the whole machine for every rotor
+    # position state, both filled in as the states are reached
+    def __init__(
+        self,
+        reflector: str,
+        rotors: tuple[str, ...],
+        rings: tuple[str, ...],
+        plugboard: tuple[str, ...],
+    ) -> None:
+        rotors = [
+            Rotor(wiring2perm(w), char2pos(NOTCH[w]), char2pos(r), 0)
+            for w, r in zip(rotors, rings)
+        ]
+        self.notches = tuple(rotor.notch for rotor in rotors)
+        self.forward = [rotor.tables() for rotor in rotors]
+        self.backward = [rotor.tables(reverse=True) for rotor in rotors]
+        self.reflector = Rotor(wiring2perm(reflector), 0, 0, 0).tables()[0]
+        plugboard_perm = steckerverbindungen2perm(list(plugboard))
+        self.plugboard = Rotor(plugboard_perm, 0, 0, 0).tables()[0]
+        self.steps = {}
+        self.substitutions = {}
+
+    def step(self, state: tuple[int, ...]) -> tuple[int, ...]:
+        # the same rule as Enigma.rotate
+        positions = list(state)
+        for i in reversed(range(len(positions))):
+            is_advanced = positions[i] == self.notches[i]
+            positions[i] = (positions[i] + 1) % 26
+            if not is_advanced:
+                break
+        self.steps[state] = next_state = tuple(positions)
+        return next_state
+
+    def substitution(self, state: tuple[int, ...]) -> str:
+        text = WIRING['ETW'].translate(self.plugboard)
+        for tables, pos in zip(reversed(self.forward), reversed(state)):
+            text = text.translate(tables[pos])
+        text = text.translate(self.reflector)
+        for tables, pos in zip(self.backward, state):
+            text = text.translate(tables[pos])
+        text = text.translate(self.plugboard)
+        # str.translate indexes a str table by ordinal, only letters reach it
+        self.substitutions[state] = table = TRANSLATE_PREFIX + text
+        return table
+
+    def states(self, state: tuple[int, ...], count: int) -> list[tuple[int, ...]]:
+        # positions before each of the next count characters, at most one period
+        states = []
+        while len(states) < count:
+            state = self.steps.get(state) or self.step(state)
+            if states and state == states[0]:
+                break
+            states.append(state)
+        return states
+
+    def transmute(
+        self, text: str, state: tuple[int, ...]
+    ) -> tuple[str, tuple[int, ...]]:
+        # characters that share a rotor position state are translated together
+        parts = NON_ALPHABET.split(text)
+        letters = ''.join(parts[::2])
+        states = self.states(state, len(letters))
+        period = len(states)
+        result = [''] * len(letters)
+        for i, position in enumerate(states):
+            table = self.substitutions.get(position) or self.substitution(position)
+            result[i::period] = letters[i::period].translate(table)
+        letters = ''.join(result)
+
+        start = 0
+        for i in range(0, len(parts), 2):
+            end = start + len(parts[i])
+            parts[i] = letters[start:end]
+            start = end
+        if letters:
+            state = states[(len(letters) - 1) % period]
+        return ''.join(parts), state
+
+
+# a fully visited configuration holds about 5 MB of tables
+@lru_cache(maxsize=8)
+def compile_enigma(
+    reflector: str,
+    rotors: tuple[str, ...],
+    rings: tuple[str, ...],
+    plugboard: tuple[str, ...],
+) -> CompiledEnigma:
+    return CompiledEnigma(reflector, rotors, rings, plugboard)
@@ -3,16 +3,17 @@ import termios
 
 from enigma import Enigma
 
+verbose = len(sys.argv) - 1
+
 enigma = Enigma(
     reflector='UKW-A',
     rotors=['II', 'I', 'III'],
     rings=['X', 'M', 'V'],
     positions=['A', 'B', 'L'],
     plugboard=['AM', 'FI', 'NV', 'PS', 'TU', 'WZ'],
+    trace=bool(verbose),
 )
 
-verbose = len(sys.argv) - 1
-
 fd = sys.stdin.fileno()
 old_settings = termios.tcgetattr(fd)
 settings = termios.tcgetattr(fd)
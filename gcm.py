@@ -0,0 +1,151 @@
+from functools import lru_cache
+from hmac import compare_digest
+
+from aes import AES
+from modes import BlockModeContext, xor_bytes
+
+GHASH_POLY = 0xE1 << 120
+GHASH_CACHE_SIZE = 16
+TAG_SIZE = 16
+
+
+@lru_cache(maxsize=GHASH_CACHE_SIZE)
+def ghash_tables(h: int) -> tuple[tuple[int, ...], ...]:
+    # basis[i] = x^i * H, bit order as in GCM where x^0 is the most significant bit
+    basis = [h]
+    for _ in range(127):
+        v = basis[-1]
+        basis.append(v >> 1 ^ GHASH_POLY if v & 1 else v >> 1)
+
+    tables = []
+    for j in range(16):  # table for byte j of the block, byte 0 holds x^0..x^7
+        table = [0] * 256
+        for b in range(1, 256):
+            low = b & -b
+            table[b] = table[b ^ low] ^ basis[8 * j + 8 - low.bit_length()]
+        tables.append(tuple(table))
+    return tuple(tables)
+
+
+def ghash_block(y: int, tables: tuple[tuple[int, ...], ...]) -> int:
+    z = 0
+    for table, b in zip(tables, y.to_bytes(16)):
+        z ^= table[b]
+    return z
+
+
+class GCMContext(BlockModeContext):
+    def __init__(
+        self,
+        cipher: AES,
+        tables: tuple[tuple[int, ...], ...],
+        iv: bytes,
+        aad: bytes = b'',
+        decrypt: bool = False,
+        tag: bytes | None = None,
+    ) -> None:
+        if not iv:
+            raise ValueError('Mode GCM requires a non-empty iv')
+        self.tables = tables
+        self.hash = 0
+        if len(iv) == 12:
+            j0 = int.from_bytes(iv) << 32 | 1
+        else:
+            self.hash_data(iv)
+            self.hash_block(len(iv) * 8)
+            j0, self.hash = self.hash, 0
+
+        super().__init__(
+            cipher.encrypt_block,
+            cipher.decrypt_block,
+            16,
+            'CTR',
+            j0.to_bytes(16),
+            decrypt,
+        )
+        self.process = self._gcm
+        self.prefix = j0 & ~0xFFFFFFFF
+        self.counter = j0 & 0xFFFFFFFF
+        self.tag_mask = int.from_bytes(cipher.encrypt_block(j0.to_bytes(16)))
+        self.expected_tag = tag
+        self.tag = None
+        self.aad_size = 0
+        self.aad_tail = b''
+        self.aad_closed = False
+        self.data_size = 0
+        self.update_aad(aad)
+
+    def hash_block(self, block: int) -> None:
+        self.hash = ghash_block(self.hash ^ block, self.tables)
+
+    def hash_data(self, data: bytes) -> None:
+        for i in range(0, len(data), 16):
+            block = data[i : i + 16]
+            self.hash_block(int.from_bytes(block) << 8 * (16 - len(block)))
+
+    def update_aad(self, data: bytes) -> None:
+        if self.aad_closed:
+            raise ValueError('AAD must be passed before the data')
+        self.aad_size += len(data)
+        data = self.aad_tail + bytes(data)
+        size = len(data) // 16 * 16
+        self.hash_data(data[:size])
+        self.aad_tail = data[size:]
+
+    def flush_aad(self) -> None:
+        # the first update or finalize pads the AAD, no more of it can follow
+        if self.aad_tail:
+            self.hash_data(self.aad_tail)
+            self.aad_tail = b''
+        self.aad_closed = True
+
+    def _gcm(self, block: bytes) -> bytes:
+        self.counter = (self.counter + 1) & 0xFFFFFFFF
+        key = self.encrypt_block((self.prefix | self.counter).to_bytes(16))
+        result = xor_bytes(block, key)
+        self.hash_data(block if self.decrypt else result)
+        self.data_size += len(block)
+        return result
+
+    def update_into(self, data: bytes, out: bytearray | memoryview) -> int:
+        self.flush_aad()
+        return super().update_into(data, out)
+
+    def finalize(self) -> bytes:
+        self.flush_aad()
+        result = super().finalize()
+        self.hash_block(self.aad_size * 8 << 64 | self.data_size * 8)
+        tag = (self.tag_mask ^ self.hash).to_bytes(16)
+        if not self.decrypt:
+            self.tag = tag
+        elif not compare_digest(tag[: len(self.expected_tag)], self.expected_tag):
+            raise ValueError('Authentication failed')
+        return result
+
+
+class AESGCM:
+    def __init__(self, key: int | bytes) -> None:
+        self.cipher = AES(key)
+        h = int.from_bytes(self.cipher.encrypt_block(bytes(16)))
+        self.tables = ghash_tables(h)
+
+    def encryptor(self, iv: bytes, aad: bytes = b'') -> GCMContext:
+        return GCMContext(self.cipher, self.tables, iv, aad)
+
+    def decryptor(self, iv: bytes, tag: bytes, aad: bytes = b'') -> GCMContext:
+        if not 4 <= len(tag) <= 16:
+            raise ValueError(f'Incorrect tag size {len(tag)}')
+        return GCMContext(self.cipher, self.tables, iv, aad, True, tag)
+
+    def seal(self, iv: bytes, data: bytes, aad: bytes = b'') -> bytearray:
+        context = self.encryptor(iv, aad)
+        result = context.crypt(data)
+        result += context.tag
+        return result
+
+    def open(self, iv: bytes, data: bytes, aad: bytes = b'') -> bytearray:
+        if len(data) < TAG_SIZE:
+            raise ValueError('Data is too short to contain a tag')
+        data = memoryview(data)
+        context = self.decryptor(iv, bytes(data[-TAG_SIZE:]), aad)
+        return context.crypt(data[:-TAG_SIZE])
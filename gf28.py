@@ -0,0 +1,73 @@
+from collections.abc import Iterable
+from functools import lru_cache
+
+POLY = 0x11B  # x^8 + x^4 + x^3 + x + 1, the AES polynomial
+
+
+def exp_log_tables() -> tuple[tuple[int, ...], tuple[int, ...]]:
+    # powers of the generator x + 1 and their discrete logarithms
+    exp_table = []
+    x = 1
+    for _ in range(255):
+        exp_table.append(x)
+        x ^= x << 1
+        if x & 0x100:
+            x ^= POLY
+    log_table = [0] * 256
+    for i, x in enumerate(exp_table):
+        log_table[x] = i
+    return tuple(exp_table), tuple(log_table)
+
+
+EXP_TABLE, LOG_TABLE = exp_log_tables()
+# doubled so that EXP[LOG[a] + LOG[b]] needs no reduction modulo 255
+EXP = EXP_TABLE * 2
+LOG = LOG_TABLE
+
+
+def gf_mul(a: int, b: int) -> int:
+    return EXP[LOG[a] + LOG[b]] if a and b else 0
+
+
+def gf_inv(a: int) -> int:
+    if not a:
+        raise ZeroDivisionError('0 has no inverse in GF(2^8)')
+    return EXP[255 - LOG[a]]
+
+
+def gf_div(a: int, b: int) -> int:
+    return gf_mul(a, gf_inv(b))
+
+
+def gf_pow(a: int, n: int) -> int:
+    if not a:
+        if n < 0:
+            raise ZeroDivisionError('0 has no inverse in GF(2^8)')
+        return 0 if n else 1
+    return EXP[LOG[a] * n % 255]
+
+
+@lru_cache(maxsize=256)
+def mul_table(c: int) -> bytes:
+    return bytes(gf_mul(x, c) for x in range(256))
+
+
+def mul_bytes(data: bytes, c: int) -> bytes:
+    return data.translate(mul_table(c))
+
+
+def add_bytes(a: bytes, b: bytes) -> bytes:
+    if len(a) != len(b):
+        raise ValueError('Buffers must have the same size')
+    return (int.from_bytes(a) ^ int.from_bytes(b)).to_bytes(len(a))
+
+
+def dot(coefs: Iterable[int], buffers: Iterable[bytes]) -> bytes:
+    result, size = 0, None
+    for c, data in zip(coefs, buffers, strict=True):
+        if size is None:
+            size = len(data)
+        elif len(data) != size:
+            raise ValueError('Buffers must have the same size')
+        result ^= int.from_bytes(mul_bytes(data, c))
+    return result.to_bytes(size or 0)
@@ -0,0 +1,187 @@
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+
+BlockFun = Callable[[bytes], bytes]
+PADDED_MODES = ('ECB', 'CBC')
+STREAM_MODES = ('CTR', 'OFB')
+
+
+def xor_bytes(data: bytes, key: bytes) -> bytes:
+    size = len(data)
+    return (int.from_bytes(data) ^ int.from_bytes(key[:size])).to_bytes(size)
+
+
+def pkcs7_padding(data_size: int, block_size: int) -> bytes:
+    padding_size = block_size - data_size % block_size
+    return padding_size.to_bytes() * padding_size
+
+
+def pkcs7_pad(data: bytes, block_size: int) -> bytes:
+    return bytes(data) + pkcs7_padding(len(data), block_size)
+
+
+def pkcs7_padding_size(data: bytes, block_size: int) -> int:
+    padding_size = data[-1] if data else 0
+    if not 0 < padding_size <= block_size:
+        raise ValueError('Incorrect padding')
+    if bytes(data[-padding_size:]).count(padding_size) != padding_size:
+        raise ValueError('Incorrect padding')
+    return padding_size
+
+
+def pkcs7_unpad(data: bytes, block_size: int) -> bytes:
+    return data[: -pkcs7_padding_size(data, block_size)]
+
+
+class BlockModeContext:
+    def __init__(
+        self,
+        encrypt_block: BlockFun,
+        decrypt_block: BlockFun,
+        block_size: int,
+        mode: str = 'ECB',
+        iv: bytes | None = None,
+        decrypt: bool = False,
+    ) -> None:
+        mode = mode.upper()
+        if mode not in PADDED_MODES + STREAM_MODES:
+            raise ValueError(f'Unknown mode {mode!r}')
+        if mode != 'ECB' and (iv is None or len(iv) != block_size):
+            raise ValueError(f'Mode {mode} requires a {block_size}-byte iv')
+
+        self.encrypt_block = encrypt_block
+        self.decrypt_block = decrypt_block
+        self.block_size = block_size
+        self.mode = mode
+        self.decrypt = decrypt
+        self.padded = mode in PADDED_MODES
+        self.chain = bytes(iv) if iv is not None else b''
+        self.counter = int.from_bytes(self.chain)
+        self.tail = bytearray()
+        self.finalized = False
+        self.process = getattr(self, f'_{mode.lower()}_{"dec" if decrypt else "enc"}')
+
+    def _ecb_enc(self, block: bytes) -> bytes:
+        return self.encrypt_block(block)
+
+    def _ecb_dec(self, block: bytes) -> bytes:
+        return self.decrypt_block(block)
+
+    def _cbc_enc(self, block: bytes) -> bytes:
+        self.chain = self.encrypt_block(xor_bytes(block, self.chain))
+        return self.chain
+
+    def _cbc_dec(self, block: bytes) -> bytes:
+        result = xor_bytes(self.decrypt_block(block), self.chain)
+        self.chain = bytes(block)
+        return result
+
+    def _ctr_enc(self, block: bytes) -> bytes:
+        key = self.encrypt_block(self.counter.to_bytes(self.block_size))
+        self.counter = (self.counter + 1) % (1 << 8 * self.block_size)
+        return xor_bytes(block, key)
+
+    def _ofb_enc(self, block: bytes) -> bytes:
+        self.chain = self.encrypt_block(self.chain)
+        return xor_bytes(block, self.chain)
+
+    _ctr_dec = _ctr_enc
+    _ofb_dec = _ofb_enc
+
+    def output_size(self, input_size: int) -> int:
+        size = (len(self.tail) + input_size) // self.block_size * self.block_size
+        if self.padded and self.decrypt and size == len(self.tail) + input_size:
+            size -= self.block_size  # keep the last block back for unpadding
+        return max(size, 0)
+
+    def update_into(self, data: bytes, out: bytearray | memoryview) -> int:
+        if self.finalized:
+            raise ValueError('Context was already finalized')
+        data = memoryview(data)
+        size = self.output_size(len(data))
+        if len(out) < size:
+            raise ValueError(f'Output buffer is too small, {size} bytes required')
+        if not size:
+            self.tail += data
+            return 0
+
+        out = memoryview(out)
+        bs = self.block_size
+        start = -len(self.tail)
+        first = 0
+        if start:
+            first = start + bs
+            out[:bs] = self.process(bytes(self.tail) + data[:first])
+        for i in range(first, start + size, bs):
+            out[i - start : i - start + bs] = self.process(data[i : i + bs])
+        self.tail = bytearray(data[start + size :])
+        return size
+
+    def update(self, data: bytes) -> bytes:
+        out = bytearray(self.output_size(len(data)))
+        self.update_into(data, out)
+        return bytes(out)
+
+    def finalize(self) -> bytes:
+        if self.finalized:
+            raise ValueError('Context was already finalized')
+        self.finalized = True
+        tail = bytes(self.tail)
+        self.tail.clear()
+        if not self.padded:
+            return self.process(tail) if tail else b''
+        if not self.decrypt:
+            return self.process(pkcs7_pad(tail, self.block_size))
+        if len(tail) != self.block_size:
+            raise ValueError('Data size is not a multiple of the block size')
+        return pkcs7_unpad(self.process(tail), self.block_size)
+
+    def finalize_into(self, out: bytearray | memoryview) -> int:
+        result = self.finalize()
+        if len(out) < len(result):
+            raise ValueError(
+                f'Output buffer is too small, {len(result)} bytes required'
+            )
+        out[: len(result)] = result
+        return len(result)
+
+    def crypt(
+        self,
+        data: bytes,
+        out: bytearray | memoryview | None = None,
+    ) -> bytearray | memoryview:
+        if out is None:
+            out = bytearray(self.output_size(len(data)) + self.block_size)
+        with memoryview(out) as view:
+            size = self.update_into(data, view)
+            size += self.finalize_into(view[size:])
+        if isinstance(out, bytearray):
+            del out[size:]
+            return out
+        return out[:size]
+
+
+class BlockCipher(ABC):
+    block_size: int
+
+    @abstractmethod
+    def encrypt_block(self, block_b: bytes) -> bytes: ...
+
+    @abstractmethod
+    def decrypt_block(self, block_b: bytes) -> bytes: ...
+
+    def encryptor(self, mode='ECB', iv: bytes | None = None) -> BlockModeContext:
+        return BlockModeContext(
+            self.encrypt_block, self.decrypt_block, self.block_size, mode, iv
+        )
+
+    def decryptor(self, mode='ECB', iv: bytes | None = None) -> BlockModeContext:
+        return BlockModeContext(
+            self.encrypt_block, self.decrypt_block, self.block_size, mode, iv, True
+        )
+
+    def encrypt(self, data: bytes, mode='ECB', iv: bytes | None = None) -> bytearray:
+        return self.encryptor(mode, iv).crypt(data)
+
+    def decrypt(self, data: bytes, mode='ECB', iv: bytes | None = None) -> bytearray:
+        return self.decryptor(mode, iv).crypt(data)
@@ -1,52 +1,176 @@
-from functools import reduce
+from collections.abc import Iterator
+from functools import lru_cache, partial
 from operator import xor
+from struct import Struct
 
+MASK = (1 << 64) - 1
 
-def rol64(a: int, n: int) -> int:
-    return (a >> 64 - n % 64) | (a << n % 64) % (1 << 64)
-
-
-def keccakF1600(state: bytearray) -> bytearray:
-    lanes = [
-        [int.from_bytes(state[8 * (x + 5 * y) : 8 * (x + 5 * y) + 8]) for y in range(5)]
-        for x in range(5)
-    ]
 
+def round_constants() -> tuple[int, ...]:
+    constants = []
     R = 1
     for _ in range(24):
-        # θ
-        C = [reduce(xor, lanes[x]) for x in range(5)]
-        D = [C[(x - 1) % 5] ^ rol64(C[(x + 1) % 5], 1) for x in range(5)]
-        for x in range(5):
-            for y in range(5):
-                lanes[x][y] ^= D[x]
-
-        # ρ and π
-        (x, y) = (1, 0)
-        current = lanes[x][y]
-        for t in range(24):
-            (x, y) = (y, (2 * x + 3 * y) % 5)
-            (current, lanes[x][y]) = (
-                lanes[x][y],
-                rol64(current, (t + 1) * (t + 2) // 2),
-            )
-
-        # χ
-        for y in range(5):
-            T = [lanes[x][y] for x in range(5)]
-            for x in range(5):
-                lanes[x][y] = T[x] ^ (~T[(x + 1) % 5] & T[(x + 2) % 5])
-
-        # ι
+        rc = 0
         for j in range(7):
             R = ((R << 1) ^ ((R >> 7) * 0x71)) % 256
             if R & 2:
-                lanes[0][0] ^= 1 << (1 << j) - 1
+                rc ^= 1 << (1 << j) - 1
+        constants.append(rc)
+    return tuple(constants)
+
+
+ROUND_CONSTANTS = round_constants()
+STATE_LANES = Struct('<25Q')
+
 
-    state = bytearray().join(
-        [lanes[x][y].to_bytes(8) for y in range(5) for x in range(5)]
+# lane aXY is lanes[X + 5 * Y], the ρ offsets and π destinations are inlined
+def keccak_f1600(lanes: list[int], rounds: int = 24) -> None:
+    # fmt: off
+    (
+        a00, a10, a20, a30, a40,
+        a01, a11, a21, a31, a41,
+        a02, a12, a22, a32, a42,
+        a03, a13, a23, a33, a43,
+        a04, a14, a24, a34, a44,
+    ) = lanes
+    # fmt: on
+    for rc in ROUND_CONSTANTS[24 - rounds :]:
+        # θ
+        c0 = a00 ^ a01 ^ a02 ^ a03 ^ a04
+        c1 = a10 ^ a11 ^ a12 ^ a13 ^ a14
+        c2 = a20 ^ a21 ^ a22 ^ a23 ^ a24
+        c3 = a30 ^ a31 ^ a32 ^ a33 ^ a34
+        c4 = a40 ^ a41 ^ a42 ^ a43 ^ a44
+        d0 = c4 ^ (c1 << 1 & MASK | c1 >> 63)
+        d1 = c0 ^ (c2 << 1 & MASK | c2 >> 63)
+        d2 = c1 ^ (c3 << 1 & MASK | c3 >> 63)
+        d3 = c2 ^ (c4 << 1 & MASK | c4 >> 63)
+        d4 = c3 ^ (c0 << 1 & MASK | c0 >> 63)
+
+        # ρ and π
+        b00 = a00 ^ d0
+        t = a10 ^ d1
+        b02 = t << 1 & MASK | t >> 63
+        t = a20 ^ d2
+        b04 = t << 62 & MASK | t >> 2
+        t = a30 ^ d3
+        b01 = t << 28 & MASK | t >> 36
+        t = a40 ^ d4
+        b03 = t << 27 & MASK | t >> 37
+        t = a01 ^ d0
+        b13 = t << 36 & MASK | t >> 28
+        t = a11 ^ d1
+        b10 = t << 44 & MASK | t >> 20
+        t = a21 ^ d2
+        b12 = t << 6 & MASK | t >> 58
+        t = a31 ^ d3
+        b14 = t << 55 & MASK | t >> 9
+        t = a41 ^ d4
+        b11 = t << 20 & MASK | t >> 44
+        t = a02 ^ d0
+        b21 = t << 3 & MASK | t >> 61
+        t = a12 ^ d1
+        b23 = t << 10 & MASK | t >> 54
+        t = a22 ^ d2
+        b20 = t << 43 & MASK | t >> 21
+        t = a32 ^ d3
+        b22 = t << 25 & MASK | t >> 39
+        t = a42 ^ d4
+        b24 = t << 39 & MASK | t >> 25
+        t = a03 ^ d0
+        b34 = t << 41 & MASK | t >> 23
+        t = a13 ^ d1
+        b31 = t << 45 & MASK | t >> 19
+        t = a23 ^ d2
+        b33 = t << 15 & MASK | t >> 49
+        t = a33 ^ d3
+        b30 = t << 21 & MASK | t >> 43
+        t = a43 ^ d4
+        b32 = t << 8 & MASK | t >> 56
+        t = a04 ^ d0
+        b42 = t << 18 & MASK | t >> 46
+        t = a14 ^ d1
+        b44 = t << 2 & MASK | t >> 62
+        t = a24 ^ d2
+        b41 = t << 61 & MASK | t >> 3
+        t = a34 ^ d3
+        b43 = t << 56 & MASK | t >> 8
+        t = a44 ^ d4
+        b40 = t << 14 & MASK | t >> 50
+
+        # χ and ι
+        a00 = b00 ^ (~b10 & b20) ^ rc
+        a10 = b10 ^ (~b20 & b30)
+        a20 = b20 ^ (~b30 & b40)
+        a30 = b30 ^ (~b40 & b00)
+        a40 = b40 ^ (~b00 & b10)
+        a01 = b01 ^ (~b11 & b21)
+        a11 = b11 ^ (~b21 & b31)
+        a21 = b21 ^ (~b31 & b41)
+        a31 = b31 ^ (~b41 & b01)
+        a41 = b41 ^ (~b01 & b11)
+        a02 = b02 ^ (~b12 & b22)
+        a12 = b12 ^ (~b22 & b32)
+        a22 = b22 ^ (~b32 & b42)
+        a32 = b32 ^ (~b42 & b02)
+        a42 = b42 ^ (~b02 & b12)
+        a03 = b03 ^ (~b13 & b23)
+        a13 = b13 ^ (~b23 & b33)
+        a23 = b23 ^ (~b33 & b43)
+        a33 = b33 ^ (~b43 & b03)
+        a43 = b43 ^ (~b03 & b13)
+        a04 = b04 ^ (~b14 & b24)
+        a14 = b14 ^ (~b24 & b34)
+        a24 = b24 ^ (~b34 & b44)
+        a34 = b34 ^ (~b44 & b04)
+        a44 = b44 ^ (~b04 & b14)
+
+    # fmt: off
+    lanes[:] = (
+        a00, a10, a20, a30, a40,
+        a01, a11, a21, a31, a41,
+        a02, a12, a22, a32, a42,
+        a03, a13, a23, a33, a43,
+        a04, a14, a24, a34, a44,
     )
-    return state
+    # fmt: on
+
+
+def keccakF1600(state: bytearray) -> bytearray:
+    lanes = list(STATE_LANES.unpack(state))
+    keccak_f1600(lanes)
+    return bytearray(STATE_LANES.pack(*lanes))
+
+
+@lru_cache
+def rate_lanes(rate_in_bytes: int) -> Struct:
+    return Struct(f'<{rate_in_bytes // 8}Q')
+
+
+def absorb_blocks(
+    lanes: list[int], data: bytes, words: Struct, rounds: int = 24
+) -> None:
+    for block in words.iter_unpack(data):
+        lanes[: len(block)] = map(xor, lanes, block)
+        keccak_f1600(lanes, rounds)
+
+
+def pad_block(tail: bytes, rate_in_bytes: int, delimited_suffix: int) -> bytearray:
+    assert not delimited_suffix & 0x80
+    block = bytearray(rate_in_bytes)
+    block[: len(tail)] = tail
+    block[len(tail)] ^= delimited_suffix
+    block[-1] ^= 0x80
+    return block
+
+
+def squeeze_blocks(
+    lanes: list[int], words: Struct, rounds: int = 24
+) -> Iterator[bytes]:
+    size = words.size // 8
+    while True:
+        yield words.pack(*lanes[:size])
+        keccak_f1600(lanes, rounds)
 
 
 def keccak(
@@ -55,30 +179,24 @@ def keccak(
     capacity: int,
     delimited_suffix: int,
     output_byte_len: int,
+    rounds: int = 24,
 ) -> bytes:
-    if rate + capacity != 1600 or rate % 8 != 0:
+    if rate + capacity != 1600 or rate % 64 != 0:
         raise ValueError
 
     rate_in_bytes = rate // 8
-    state = bytearray(200)
-
-    block_size = 0
-    for i in range(-(-len(data) // rate_in_bytes)):
-        block = data[i * rate_in_bytes : (i + 1) * rate_in_bytes]
-        block_size = len(block)
-        state[:block_size] = [a ^ b for a, b in zip(state, block)]
-        if block_size == rate_in_bytes:
-            state = keccakF1600(state)
-            block_size = 0
-
-    state[block_size] ^= delimited_suffix
-    assert not delimited_suffix & 0x80
-    state[rate_in_bytes - 1] ^= 0x80
+    words = rate_lanes(rate_in_bytes)
+    lanes = [0] * 25
 
-    return b''.join(
-        (state := keccakF1600(state))[:rate_in_bytes]
-        for _ in range(-(-output_byte_len // rate_in_bytes))
-    )[:output_byte_len]
+    data = memoryview(data)
+    end = len(data) // rate_in_bytes * rate_in_bytes
+    absorb_blocks(lanes, data[:end], words, rounds)
+    block = pad_block(data[end:], rate_in_bytes, delimited_suffix)
+    absorb_blocks(lanes, block, words, rounds)
+
+    blocks = squeeze_blocks(lanes, words, rounds)
+    count = -(-output_byte_len // rate_in_bytes)
+    return b''.join(next(blocks) for _ in range(count))[:output_byte_len]
 
 
 def sha3_224(data: bytes) -> bytes:
@@ -103,3 +221,320 @@ def shake128(data: bytes, output_byte_len: int) -> bytes:
 
 def shake256(data: bytes, output_byte_len: int) -> bytes:
     return keccak(data, 1088, 512, 0x1F, output_byte_len)
+
+
+class KeccakHash:
+    name: str
+    rate: int
+    delimited_suffix: int
+    digest_size: int
+
+    def __init__(self, data: bytes = b'') -> None:
+        self.block_size = self.rate // 8
+        self.words = rate_lanes(self.block_size)
+        self.lanes = [0] * 25
+        self.buffer = bytearray()
+        self.update(data)
+
+    def update(self, data: bytes) -> None:
+        data = memoryview(data)
+        size = self.block_size
+        if self.buffer:
+            start = size - len(self.buffer)
+            self.buffer += data[:start]
+            data = data[start:]
+            if len(self.buffer) < size:
+                return
+            absorb_blocks(self.lanes, bytes(self.buffer), self.words)
+            self.buffer.clear()
+        end = len(data) // size * size
+        absorb_blocks(self.lanes, data[:end], self.words)
+        self.buffer += data[end:]
+
+    def copy(self) -> 'KeccakHash':
+        other = object.__new__(self.__class__)
+        other.__dict__.update(self.__dict__)
+        other.lanes = list(self.lanes)
+        other.buffer = bytearray(self.buffer)
+        return other
+
+    def squeeze(self) -> Iterator[bytes]:
+        # works on a padded copy so that the object can still be updated
+        lanes = list(self.lanes)
+        block = pad_block(self.buffer, self.block_size, self.delimited_suffix)
+        absorb_blocks(lanes, block, self.words)
+        return squeeze_blocks(lanes, self.words)
+
+    def read_output(self, length: int) -> bytes:
+        blocks = self.squeeze()
+        count = -(-length // self.block_size)
+        return b''.join(next(blocks) for _ in range(count))[:length]
+
+    def digest(self) -> bytes:
+        return self.read_output(self.digest_size)
+
+    def hexdigest(self) -> str:
+        return self.digest().hex()
+
+
+class SHAKE(KeccakHash):
+    digest_size = 0  # the output length is chosen by the caller, as in hashlib
+
+    def __init__(self, data: bytes = b'') -> None:
+        self.output = None
+        self.output_tail = b''
+        super().__init__(data)
+
+    def update(self, data: bytes) -> None:
+        if self.output is not None:
+            raise ValueError('Can not update after reading the output')
+        super().update(data)
+
+    def copy(self) -> 'SHAKE':
+        if self.output is not None:
+            raise ValueError('Can not copy after reading the output')
+        return super().copy()
+
+    def digest(self, length: int) -> bytes:
+        return self.read_output(length)
+
+    def hexdigest(self, length: int) -> str:
+        return self.digest(length).hex()
+
+    def read(self, length: int) -> bytes:
+        if self.output is None:
+            self.output = self.squeeze()
+        blocks = [self.output_tail]
+        size = len(self.output_tail)
+        while size < length:
+            blocks.append(next(self.output))
+            size += len(blocks[-1])
+        data = b''.join(blocks)
+        self.output_tail = data[length:]
+        return data[:length]
+
+
+class SHA3_224(KeccakHash):
+    name, rate, delimited_suffix, digest_size = 'sha3_224', 1152, 0x06, 28
+
+
+class SHA3_256(KeccakHash):
+    name, rate, delimited_suffix, digest_size = 'sha3_256', 1088, 0x06, 32
+
+
+class SHA3_384(KeccakHash):
+    name, rate, delimited_suffix, digest_size = 'sha3_384', 832, 0x06, 48
+
+
+class SHA3_512(KeccakHash):
+    name, rate, delimited_suffix, digest_size = 'sha3_512', 576, 0x06, 64
+
+
+class SHAKE128(SHAKE):
+    name, rate, delimited_suffix = 'shake_128', 1344, 0x1F
+
+
+class SHAKE256(SHAKE):
+    name, rate, delimited_suffix = 'shake_256', 1088, 0x1F
+
+
+class CSHAKE(SHAKE):
+    def __init__(
+        self,
+        data: bytes = b'',
+        function_name: bytes = b'',
+        customization: bytes = b'',
+    ) -> None:
+        # without a name and a customization string cSHAKE is plain SHAKE
+        if function_name or customization:
+            self.delimited_suffix = 0x04
+        super().__init__()
+        if function_name or customization:
+            prefix = encode_string(function_name) + encode_string(customization)
+            self.update(bytepad(prefix, self.block_size))
+        self.update(data)
+
+
+class CSHAKE128(CSHAKE):
+    name, rate, delimited_suffix = 'cshake_128', 1344, 0x1F
+
+
+class CSHAKE256(CSHAKE):
+    name, rate, delimited_suffix = 'cshake_256', 1088, 0x1F
+
+
+def left_encode(n: int) -> bytes:
+    data = n.to_bytes(max(1, -(-n.bit_length() // 8)))
+    return bytes([len(data)]) + data
+
+
+def right_encode(n: int) -> bytes:
+    data = n.to_bytes(max(1, -(-n.bit_length() // 8)))
+    return data + bytes([len(data)])
+
+
+def encode_string(data: bytes) -> bytes:
+    return left_encode(len(data) * 8) + data
+
+
+def bytepad(data: bytes, w: int) -> bytes:
+    data = left_encode(w) + data
+    return data + bytes(-len(data) % w)
+
+
+def cshake128(
+    data: bytes,
+    output_byte_len: int,
+    function_name: bytes = b'',
+    customization: bytes = b'',
+) -> bytes:
+    return CSHAKE128(data, function_name, customization).digest(output_byte_len)
+
+
+def cshake256(
+    data: bytes,
+    output_byte_len: int,
+    function_name: bytes = b'',
+    customization: bytes = b'',
+) -> bytes:
+    return CSHAKE256(data, function_name, customization).digest(output_byte_len)
+
+
+TREE_CHUNK_SIZE = 1 << 18
+K12_LEAF_SIZE = 8192
+
+
+def hash_leaves(
+    data: bytes,
+    leaf_size: int,
+    rate: int,
+    delimited_suffix: int,
+    output_byte_len: int,
+    rounds: int,
+) -> bytes:
+    return b''.join(
+        keccak(
+            data[i : i + leaf_size],
+            rate,
+            1600 - rate,
+            delimited_suffix,
+            output_byte_len,
+            rounds,
+        )
+        for i in range(0, len(data), leaf_size)
+    )
+
+
+def tree_leaves(
+    data: bytes,
+    leaf_size: int,
+    rate: int,
+    delimited_suffix: int,
+    output_byte_len: int,
+    rounds: int = 24,
+    workers: int | None = None,
+    chunk_size=TREE_CHUNK_SIZE,
+) -> bytes:
+    # chaining values of all leaves, a chunk of whole leaves per task,
+    # only the chunks sent to worker processes are copied
+    data = memoryview(data)
+    chunk_size = max(chunk_size // leaf_size, 1) * leaf_size
+    chunks = [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+    fun = partial(
+        hash_leaves,
+        leaf_size=leaf_size,
+        rate=rate,
+        delimited_suffix=delimited_suffix,
+        output_byte_len=output_byte_len,
+        rounds=rounds,
+    )
+    if workers == 1 or len(chunks) <= 1:
+        return b''.join(map(fun, chunks))
+
+    from multiprocessing import Pool
+
+    with Pool(workers) as pool:
+        return b''.join(pool.imap(fun, map(bytes, chunks)))
+
+
+def parallel_hash(
+    data: bytes,
+    block_size: int,
+    output_byte_len: int,
+    customization: bytes,
+    security: int,
+    xof: bool = False,
+    workers: int | None = None,
+) -> bytes:
+    if block_size <= 0:
+        raise ValueError('Block size must be positive')
+    rate = 1600 - 2 * security
+    cv_size = security // 4
+    leaves = tree_leaves(data, block_size, rate, 0x1F, cv_size, workers=workers)
+    n = -(-len(data) // block_size)
+    output_bits = 0 if xof else output_byte_len * 8
+    node = (
+        left_encode(block_size) + leaves + right_encode(n) + right_encode(output_bits)
+    )
+    cls = CSHAKE128 if security == 128 else CSHAKE256
+    return cls(node, b'ParallelHash', customization).digest(output_byte_len)
+
+
+def parallel_hash128(
+    data: bytes,
+    block_size: int,
+    output_byte_len: int,
+    customization: bytes = b'',
+    xof: bool = False,
+    workers: int | None = None,
+) -> bytes:
+    return parallel_hash(
+        data, block_size, output_byte_len, customization, 128, xof, workers
+    )
+
+
+def parallel_hash256(
+    data: bytes,
+    block_size: int,
+    output_byte_len: int,
+    customization: bytes = b'',
+    xof: bool = False,
+    workers: int | None = None,
+) -> bytes:
+    return parallel_hash(
+        data, block_size, output_byte_len, customization, 256, xof, workers
+    )
+
+
+def length_encode(n: int) -> bytes:
+    data = n.to_bytes(-(-n.bit_length() // 8))
+    return data + bytes([len(data)])
+
+
+def kangaroo_twelve(
+    data: bytes,
+    output_byte_len: int,
+    customization: bytes = b'',
+    workers: int | None = None,
+) -> bytes:
+    # S = data || customization || length_encode(len(customization)) is never
+    # built, whole leaves are read from data and only the leaves that reach
+    # the suffix are copied
+    data = memoryview(data)
+    suffix = customization + length_encode(len(customization))
+    size = len(data) + len(suffix)
+    if size <= K12_LEAF_SIZE:
+        return keccak(bytes(data) + suffix, 1344, 256, 0x07, output_byte_len, 12)
+
+    whole = len(data) // K12_LEAF_SIZE * K12_LEAF_SIZE
+    tail = bytes(data[whole:]) + suffix
+    if whole:
+        first, rest = data[:K12_LEAF_SIZE], [data[K12_LEAF_SIZE:whole], tail]
+    else:
+        first, rest = tail[:K12_LEAF_SIZE], [tail[K12_LEAF_SIZE:]]
+    leaves = b''.join(
+        tree_leaves(part, K12_LEAF_SIZE, 1344, 0x0B, 32, 12, workers) for part in rest
+    )
+    n = -(-(size - K12_LEAF_SIZE) // K12_LEAF_SIZE)
+    node = bytes(first) + b'\x03' + bytes(7) + leaves + length_encode(n)
+    return keccak(node + b'\xff\xff', 1344, 256, 0x06, output_byte_len, 12)
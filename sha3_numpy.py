@@ -0,0 +1,151 @@
+from collections.abc import Iterable
+
+import numpy as np
+
+from sha3 import ROUND_CONSTANTS
+
+BATCH_SIZE = 1 << 16
+ROUND_CONSTANT_ARRAY = np.array(ROUND_CONSTANTS, dtype=np.uint64)
+# the state is stored lane by lane, lane x + 5y of every message in row x + 5y
+LANE_X = np.arange(25) % 5
+LANE_Y = np.arange(25) // 5
+# rows of the θ parity that are added to every lane
+THETA_PREV = (LANE_X - 1) % 5
+THETA_NEXT = (LANE_X + 1) % 5
+# rows of the state that χ combines with every lane
+CHI_NEXT = (LANE_X + 1) % 5 + 5 * LANE_Y
+CHI_NEXT2 = (LANE_X + 2) % 5 + 5 * LANE_Y
+
+
+def rho_pi_tables() -> tuple[np.ndarray, np.ndarray]:
+    # lane x + 5y is rotated and moved to lane y + 5(2x + 3y)
+    offsets = np.zeros((25, 1), dtype=np.uint64)
+    source = np.zeros(25, dtype=np.intp)
+    x, y = 1, 0
+    for t in range(24):
+        offsets[x + 5 * y] = (t + 1) * (t + 2) // 2 % 64
+        x, y = y, (2 * x + 3 * y) % 5
+    for x in range(5):
+        for y in range(5):
+            source[y + 5 * ((2 * x + 3 * y) % 5)] = x + 5 * y
+    return offsets, source
+
+
+RHO_OFFSETS, PI_SOURCE = rho_pi_tables()
+RHO_OFFSETS_BACK = (64 - RHO_OFFSETS) % 64
+
+
+def keccak_f1600(state: np.ndarray) -> np.ndarray:
+    one, back = np.uint64(1), np.uint64(63)
+    for rc in ROUND_CONSTANT_ARRAY:
+        # θ
+        c = np.bitwise_xor.reduce(state.reshape(5, 5, -1), axis=0)
+        d = c[THETA_PREV] ^ (c[THETA_NEXT] << one | c[THETA_NEXT] >> back)
+        state = state ^ d[LANE_X]
+
+        # ρ and π
+        state = state << RHO_OFFSETS | state >> RHO_OFFSETS_BACK
+        state = state[PI_SOURCE]
+
+        # χ and ι
+        state ^= ~state[CHI_NEXT] & state[CHI_NEXT2]
+        state[0] ^= rc
+    return state
+
+
+def pad_messages(
+    messages: list[bytes],
+    rate_in_bytes: int,
+    delimited_suffix: int,
+) -> np.ndarray:
+    sizes = np.array([len(message) for message in messages])
+    size = (sizes[0] // rate_in_bytes + 1) * rate_in_bytes
+    buffer = bytearray(len(messages) * size)
+    for i, message in enumerate(messages):
+        buffer[i * size : i * size + len(message)] = message
+    padded = np.frombuffer(buffer, dtype=np.uint8).reshape(len(messages), size)
+    padded[np.arange(len(messages)), sizes] ^= delimited_suffix
+    padded[:, -1] ^= 0x80
+    return padded.view('<u8').reshape(len(messages), -1, rate_in_bytes // 8)
+
+
+def keccak_group(
+    messages: list[bytes],
+    rate_in_bytes: int,
+    delimited_suffix: int,
+    output_byte_len: int,
+) -> np.ndarray:
+    padded = pad_messages(messages, rate_in_bytes, delimited_suffix)
+    blocks = padded.transpose(1, 2, 0)  # (blocks, lanes in a block, messages)
+    state = np.zeros((25, len(messages)), dtype=np.uint64)
+    for block in blocks:
+        state[: len(block)] ^= block
+        state = keccak_f1600(state)
+
+    output = []
+    for _ in range(max(1, -(-output_byte_len // rate_in_bytes))):
+        if output:
+            state = keccak_f1600(state)
+        lanes = np.ascontiguousarray(state[: rate_in_bytes // 8].T, dtype='<u8')
+        output.append(lanes.view(np.uint8))
+    return np.concatenate(output, axis=1)[:, :output_byte_len]
+
+
+def keccak_batch(
+    messages: Iterable[bytes] | np.ndarray,
+    rate: int,
+    capacity: int,
+    delimited_suffix: int,
+    output_byte_len: int,
+) -> list[bytes]:
+    if rate + capacity != 1600 or rate % 64 != 0:
+        raise ValueError
+    assert not delimited_suffix & 0x80
+
+    rate_in_bytes = rate // 8
+    messages = [bytes(message) for message in messages]
+    block_counts = np.array([len(message) for message in messages]) // rate_in_bytes
+    order = np.argsort(block_counts, kind='stable')
+    bounds = np.flatnonzero(np.diff(block_counts[order])) + 1
+
+    digests = [b''] * len(messages)
+    for group in np.split(order, bounds):
+        for i in range(0, len(group), BATCH_SIZE):
+            indexes = group[i : i + BATCH_SIZE]
+            output = keccak_group(
+                [messages[j] for j in indexes],
+                rate_in_bytes,
+                delimited_suffix,
+                output_byte_len,
+            )
+            for j, digest in zip(indexes, output):
+                digests[j] = digest.tobytes()
+    return digests
+
+
+def sha3_224_batch(messages: Iterable[bytes] | np.ndarray) -> list[bytes]:
+    return keccak_batch(messages, 1152, 448, 0x06, 28)
+
+
+def sha3_256_batch(messages: Iterable[bytes] | np.ndarray) -> list[bytes]:
+    return keccak_batch(messages, 1088, 512, 0x06, 32)
+
+
+def sha3_384_batch(messages: Iterable[bytes] | np.ndarray) -> list[bytes]:
+    return keccak_batch(messages, 832, 768, 0x06, 48)
+
+
+def sha3_512_batch(messages: Iterable[bytes] | np.ndarray) -> list[bytes]:
+    return keccak_batch(messages, 576, 1024, 0x06, 64)
+
+
+def shake128_batch(
+    messages: Iterable[bytes] | np.ndarray, output_byte_len: int
+) -> list[bytes]:
+    return keccak_batch(messages, 1344, 256, 0x1F, output_byte_len)
+
+
+def shake256_batch(
+    messages: Iterable[bytes] | np.ndarray, output_byte_len: int
+) -> list[bytes]:
+    return keccak_batch(messages, 1088, 512, 0x1F, output_byte_len)
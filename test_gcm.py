@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from gcm import AESGCM
+
+KEY = bytes(range(16))
+IV = bytes(12)
+
+
+def test_streaming_matches_seal():
+    context = AESGCM(KEY).encryptor(IV)
+    context.update_aad(b'A' * 5)
+    context.update_aad(b'B' * 5)
+    result = context.update(b'hel') + context.update(b'lo') + context.finalize()
+    assert result + context.tag == AESGCM(KEY).seal(IV, b'hello', b'A' * 5 + b'B' * 5)
+
+
+@pytest.mark.parametrize('data', [b'', b'hello'])
+def test_aad_after_update_is_rejected(data):
+    context = AESGCM(KEY).encryptor(IV, b'A' * 5)
+    context.update(data)
+    with pytest.raises(ValueError):
+        context.update_aad(b'B' * 5)
+
+
+def test_aad_after_finalize_is_rejected():
+    context = AESGCM(KEY).encryptor(IV, b'A' * 5)
+    context.finalize()
+    with pytest.raises(ValueError):
+        context.update_aad(b'B' * 5)
+
+
+def test_open_roundtrip():
+    data, aad = os.urandom(100), os.urandom(20)
+    sealed = AESGCM(KEY).seal(IV, data, aad)
+    assert AESGCM(KEY).open(IV, sealed, aad) == data
+    sealed[-1] ^= 1
+    with pytest.raises(ValueError):
+        AESGCM(KEY).open(IV, sealed, aad)
@@ -0,0 +1,36 @@
+import dataclasses
+import secrets
+
+import pytest
+
+from ecdsa import secp256k1
+
+GENERIC = dataclasses.replace(secp256k1, glv=None)
+N = secp256k1.n
+EDGE_SCALARS = [0, 1, 2, N - 1, N, N + 1, -1, -N + 1, 2**128, 2**256 - 1]
+RANDOM_SCALARS = [secrets.randbelow(N) for _ in range(16)]
+POINTS = [secp256k1.g_point, secp256k1.g_point * (secrets.randbelow(N - 1) + 1)]
+
+
+@pytest.mark.parametrize('k', EDGE_SCALARS + RANDOM_SCALARS)
+@pytest.mark.parametrize('point', POINTS, ids=['g', 'random'])
+def test_mul_matches_generic_path(point, k):
+    expected = point * k
+    assert GENERIC.mul(point, k) == expected
+    assert secp256k1.mul(point, k) == expected
+
+
+@pytest.mark.parametrize('k', EDGE_SCALARS + RANDOM_SCALARS)
+def test_split(k):
+    glv = secp256k1.glv
+    k1, k2 = glv.split(k % N, N)
+    assert (k1 + k2 * glv.lam - k) % N == 0
+    assert abs(k1).bit_length() <= 129
+    assert abs(k2).bit_length() <= 129
+
+
+def test_endomorphism():
+    point = POINTS[1]
+    glv = secp256k1.glv
+    image = point * glv.lam
+    assert (image.x, image.y) == (glv.beta * point.x % secp256k1.curve.p, point.y)